@@ -0,0 +1,218 @@
+"""
+Benchmarks the API updates of ApiController against the PTX stand-in server,
+so the fetch concurrency, the cache and the retries can be measured without
+the network.
+
+Record the responses first by running the program with
+`--api-record-dir=benchmarks/recordings`.
+
+Examples:
+* `python benchmarks/bench_api.py --settings=settings/example.yml`
+* `python benchmarks/bench_api.py --workers=1,2,4,8 --latency=0.2`
+* `python benchmarks/bench_api.py --error-rate=0.2 --rate-limit=5`
+"""
+import argparse
+import datetime
+import json
+import logging
+import pathlib
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+# Run from the repository root without installing the package
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import ptx_standin  # noqa: E402
+from thsr_voice_reminder.api_controller import ApiController  # noqa: E402
+from thsr_voice_reminder.app_settings import AppSettings  # noqa: E402
+from thsr_voice_reminder.main_controller import MainController  # noqa: E402
+
+
+def read_stations_set(settings_path):
+    args = argparse.Namespace(verbose=False, settings=settings_path)
+    app_settings = AppSettings(args)
+    app_settings.load()
+    return {schedule_item.get_orig_dest()
+            for schedule_item in app_settings.iterate_schedule_items()}
+
+
+def create_api_args(bench_args, base_url, num_workers, cache_dir):
+    return argparse.Namespace(
+        verbose=False,
+        api_base_url=base_url,
+        api_record_dir=None,
+        api_max_workers=num_workers,
+        api_connect_timeout=bench_args.connect_timeout,
+        api_read_timeout=bench_args.read_timeout,
+        timetable_source=bench_args.timetable_source,
+        api_cache_dir=cache_dir)
+
+
+def update_with_retries(api_controller, stations_set, max_attempts,
+                        retry_delay):
+    """
+    Updates the API and retries on failures like MainController does, and
+    returns the number of attempts, or None if all of them have failed.
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            api_controller.update(stations_set, force=True)
+            return attempt
+        except Exception:
+            time.sleep(retry_delay)
+    return None
+
+
+def measure(name, bench_args, base_url, num_workers, stations_set, warm,
+            stats):
+    """
+    Measures the wall time of the forced updates with a new controller for
+    each run, so every run opens new connections.
+    """
+    cache_dir = tempfile.TemporaryDirectory()
+    if warm:
+        # Fill the cache before the measurement
+        api_controller = ApiController(create_api_args(
+            bench_args, base_url, num_workers, cache_dir.name))
+        update_with_retries(api_controller, stations_set,
+                            MainController.MAX_NUM_ERRORS + 1,
+                            bench_args.retry_delay)
+
+    latencies = []
+    attempts = []
+    num_failed = 0
+    before_stats = dict(stats)
+    for _ in range(bench_args.runs):
+        api_controller = ApiController(create_api_args(
+            bench_args, base_url, num_workers,
+            cache_dir.name if warm else None))
+
+        start_time = time.perf_counter()
+        num_attempts = update_with_retries(
+            api_controller, stations_set, MainController.MAX_NUM_ERRORS + 1,
+            bench_args.retry_delay)
+        latencies.append(time.perf_counter() - start_time)
+
+        if num_attempts is None:
+            num_failed += 1
+        else:
+            attempts.append(num_attempts)
+    cache_dir.cleanup()
+
+    responses = {key: stats[key] - before_stats.get(key, 0) for key in stats}
+    result = {
+        'median_ms': 1000 * statistics.median(latencies),
+        'max_ms': 1000 * max(latencies),
+        'average_attempts': statistics.mean(attempts) if attempts else None,
+        'num_failed': num_failed,
+        'responses': responses,
+    }
+    print('{:<16} median {:9.1f} ms  max {:9.1f} ms  attempts {}'
+          '  failed {}  responses {}'.format(
+              name, result['median_ms'], result['max_ms'],
+              ('{:.2f}'.format(result['average_attempts'])
+               if attempts else '-'),
+              num_failed, responses))
+    return result
+
+
+def run_benchmarks(bench_args):
+    standin_args = ptx_standin.create_parser().parse_args([
+        '--record-dir', bench_args.record_dir,
+        '--port', '0',
+        '--latency', str(bench_args.latency),
+        '--jitter', str(bench_args.jitter),
+        '--error-rate', str(bench_args.error_rate),
+        '--rate-limit', str(bench_args.rate_limit),
+        '--seed', str(bench_args.seed),
+    ])
+    server = ptx_standin.create_server(standin_args)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    (host, port) = server.server_address[:2]
+    base_url = 'http://{}:{}{}'.format(host, port, standin_args.base_path)
+    stations_set = read_stations_set(bench_args.settings)
+
+    results = {}
+    try:
+        for num_workers in bench_args.workers:
+            for warm in (False, True):
+                name = '{}_workers_{}'.format(
+                    'warm' if warm else 'cold', num_workers)
+                results[name] = measure(
+                    name, bench_args, base_url, num_workers, stations_set,
+                    warm, server.stats)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the API updates against the stand-in server')
+    parser.add_argument('--settings', type=str,
+                        default='settings/example.yml',
+                        help='Settings file of the routes to update')
+    parser.add_argument('--record-dir', type=str,
+                        default='benchmarks/recordings',
+                        help='Directory of the recorded responses')
+    parser.add_argument('--timetable-source', type=str, default='od',
+                        choices=['od', 'train_date'],
+                        help='Source of the timetables')
+    parser.add_argument('--workers', type=str, default='1,2,4,8',
+                        help='Comma-separated numbers of API workers')
+    parser.add_argument('--latency', type=float, default=0.1,
+                        help='Latency of each response in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Maximum random latency added in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Ratio of the requests failed with 500')
+    parser.add_argument('--rate-limit', type=int, default=0,
+                        help=('Maximum requests per second before'
+                              ' responding 429, 0 for no limit'))
+    parser.add_argument('--retry-delay', type=float, default=1.0,
+                        help=('Delay before retrying a failed update in'
+                              ' seconds, shorter than the program for'
+                              ' quicker runs'))
+    parser.add_argument('--connect-timeout', type=float, default=10,
+                        help='Timeout to connect to the API in seconds')
+    parser.add_argument('--read-timeout', type=float, default=30,
+                        help='Timeout to read from the API in seconds')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='Number of runs of each benchmark')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed of the latency and errors')
+    parser.add_argument('--output', type=str,
+                        help='Path to save the results as JSON')
+    bench_args = parser.parse_args()
+    bench_args.workers = [int(num_workers) for num_workers
+                          in bench_args.workers.split(',')]
+
+    # Silence the failed requests, they are counted in the results
+    logging.disable(logging.CRITICAL)
+
+    results = run_benchmarks(bench_args)
+
+    output = bench_args.output
+    if output is None:
+        output = 'benchmarks/results/api-{}.json'.format(
+            datetime.datetime.now().strftime('%Y%m%d-%H%M%S'))
+    output_path = pathlib.Path(output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(output_path), 'w', encoding='utf-8') as f:
+        json.dump({
+            'created': datetime.datetime.now().isoformat(),
+            'params': vars(bench_args),
+            'results': results,
+        }, f, indent=2)
+    print('Saved the results to {}'.format(output_path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+"""
+Benchmarks the reminder decision hot path with synthetic settings and
+timetables.
+
+Examples:
+* `python benchmarks/bench_hot_path.py`
+* `python benchmarks/bench_hot_path.py --schedule-items=500 --reminders=30`
+* `python benchmarks/bench_hot_path.py --compare=benchmarks/results/old.json`
+"""
+import argparse
+import datetime
+import json
+import logging
+import pathlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+# Run from the repository root without installing the package
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from thsr_voice_reminder.action_generator import ActionGenerator  # noqa: E402
+from thsr_voice_reminder.app_settings import AppSettings  # noqa: E402
+from thsr_voice_reminder.main_controller import MainController  # noqa: E402
+from thsr_voice_reminder.time_utils import TimeUtils  # noqa: E402
+from thsr_voice_reminder.timetable_index import TimetableIndex  # noqa: E402
+from thsr_voice_reminder.train import Train  # noqa: E402
+
+STATIONS = [
+    ('Nangang', '南港'),
+    ('Taipei', '台北'),
+    ('Banciao', '板橋'),
+    ('Taoyuan', '桃園'),
+    ('Hsinchu', '新竹'),
+    ('Miaoli', '苗栗'),
+    ('Taichung', '台中'),
+    ('Changhua', '彰化'),
+    ('Yunlin', '雲林'),
+    ('Chiayi', '嘉義'),
+    ('Tainan', '台南'),
+    ('Zuoying', '左營'),
+]
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+MESSAGE = ('各位旅客您好，{orig_departure_hour}點{orig_departure_min}分，'
+           '開往{dest_station_name_tw}、{train_number}次、'
+           '{direction_name_tw}列車即將在{min_to_orig_arrival}分鐘後進站')
+
+
+class SyntheticApiController:
+    """
+    Serves the synthetic timetables in place of the API.
+    """
+
+    def __init__(self, timetables):
+        self._timetable = {orig_and_dest: TimetableIndex(trains)
+                           for orig_and_dest, trains in timetables.items()}
+
+    def update(self, stations_set, force=False):
+        pass
+
+    def get_next_update_time(self):
+        return time.time() + 60 * 60
+
+    def get_timetable(self, orig_and_dest):
+        return self._timetable[orig_and_dest].get_trains()
+
+    def get_timetable_index(self, orig_and_dest):
+        return self._timetable[orig_and_dest]
+
+    def get_timetable_version(self):
+        return 0
+
+    def get_alert_info(self):
+        return []
+
+    def check_new_alert_info(self):
+        return False
+
+
+def generate_routes(num_routes, rng):
+    routes = [(orig, dest) for (orig, _) in STATIONS for (dest, _) in STATIONS
+              if orig != dest]
+    rng.shuffle(routes)
+    return routes[:num_routes]
+
+
+def generate_timetables(routes, num_trains, rng):
+    names = {name_en: name_tw for (name_en, name_tw) in STATIONS}
+    timetables = {}
+    for (orig, dest) in routes:
+        trains = []
+        for i in range(num_trains):
+            # Spread the trains over 06:00-24:00
+            depart_time = 6 * 60 + (18 * 60 * i) // num_trains
+            depart_time += rng.randint(0, 5)
+            duration = rng.randint(10, 120)
+            trains.append(Train(
+                str(100 + i),
+                rng.randint(0, 1),
+                {'En': orig, 'Zh_tw': names[orig]},
+                {'En': dest, 'Zh_tw': names[dest]},
+                depart_time - 1,
+                depart_time,
+                depart_time + duration,
+                depart_time + duration + 1))
+        timetables[(orig, dest)] = trains
+    return timetables
+
+
+def generate_settings(routes, num_schedule_items, num_reminders, rng):
+    now_num = TimeUtils.get_cur_time_num()
+    schedule = []
+    for i in range(num_schedule_items):
+        (orig, dest) = routes[i % len(routes)]
+        # Keep some reminder windows open around now
+        time_num = min(max(now_num + rng.randint(-60, 180), 7 * 60), 23 * 60)
+        reminders = []
+        for j in range(num_reminders):
+            before_min = 5 * (j + 1)
+            reminders.append({
+                'before_min': before_min,
+                'last_before_min': before_min - 4,
+                'repeat': 1,
+                'sound_before': 'sound/Success 04.mp3',
+                'voice': {'message': MESSAGE, 'lang': 'zh-tw'},
+            })
+        schedule.append({
+            'label': 'Item {}'.format(i),
+            'orig': orig,
+            'dest': dest,
+            'time': TimeUtils.num_to_time(time_num),
+            'target': {
+                'where': rng.choice(['orig', 'dest']),
+                'when': rng.choice(['arrival', 'departure']),
+            },
+            'enabled': True,
+            'active_weekday': WEEKDAYS,
+            'reminders': reminders,
+        })
+    return {'schedule': schedule, 'alert': {'sound': 'sound/Beep warning.mp3'}}
+
+
+def measure(name, func, num_runs):
+    """
+    Measures the latency, the retained blocks and the peak memory of the
+    function. The retained blocks are the memory blocks still allocated
+    after the call, the temporary blocks freed in the call are not counted.
+    """
+    # Warm up
+    func()
+
+    latencies = []
+    for _ in range(num_runs):
+        start_time = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    before_blocks = sys.getallocatedblocks()
+    func()
+    retained_blocks = sys.getallocatedblocks() - before_blocks
+    (_, peak_memory) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    result = {
+        'median_ms': 1000 * statistics.median(latencies),
+        'p95_ms': 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+        'retained_blocks': retained_blocks,
+        'peak_memory_kb': peak_memory / 1024,
+    }
+    print('{:<24} median {:9.3f} ms  p95 {:9.3f} ms  retained {:8d}'
+          '  peak {:10.1f} KB'.format(
+              name, result['median_ms'], result['p95_ms'],
+              result['retained_blocks'], result['peak_memory_kb']))
+    return result
+
+
+def run_benchmarks(bench_args):
+    rng = random.Random(bench_args.seed)
+
+    routes = generate_routes(bench_args.routes, rng)
+    timetables = generate_timetables(routes, bench_args.trains, rng)
+    settings = generate_settings(
+        routes, bench_args.schedule_items, bench_args.reminders, rng)
+
+    settings_file = tempfile.NamedTemporaryFile(
+        mode='w', encoding='utf-8', suffix='.yml', delete=False)
+    with settings_file:
+        yaml.safe_dump(settings, settings_file, allow_unicode=True)
+
+    args = argparse.Namespace(verbose=False, settings=settings_file.name,
+                              reminder_engine=bench_args.reminder_engine,
+                              remind_journal_dir=None)
+    app_settings = AppSettings(args)
+    app_settings.load()
+    api_controller = SyntheticApiController(timetables)
+    main_controller = MainController(
+        args, app_settings, api_controller=api_controller)
+    action_generator = ActionGenerator(args, app_settings)
+    main_controller.run_and_get_actions()
+
+    schedule_items = list(app_settings.iterate_schedule_items())
+    targets = [main_controller.find_train_to_remind(schedule_item)
+               for schedule_item in schedule_items]
+
+    def reload_settings_unchanged():
+        app_settings.load()
+
+    def reload_settings_changed():
+        # Forget the last file to parse and rebuild everything
+        app_settings.invalidate()
+        app_settings.load()
+
+    def select_trains():
+        for schedule_item in schedule_items:
+            main_controller.find_train_to_remind(schedule_item)
+
+    def evaluate_reminders():
+        main_controller.generate_reminder_actions()
+
+    def format_actions():
+        for schedule_item, target in zip(schedule_items, targets):
+            if target is None:
+                continue
+            (target_train, _) = target
+            for reminder in schedule_item.iterate_reminders():
+                action_generator.generate_reminder_action(
+                    schedule_item, target_train, reminder)
+
+    def run_tick():
+        app_settings.load()
+        main_controller.run_and_get_actions()
+
+    benchmarks = [
+        ('settings_reload', reload_settings_unchanged),
+        ('train_selection', select_trains),
+        ('reminder_evaluation', evaluate_reminders),
+        ('action_formatting', format_actions),
+        ('tick', run_tick),
+        # Last, the changed settings make the other benchmarks rebuild
+        # everything
+        ('settings_reload_changed', reload_settings_changed),
+    ]
+    results = {}
+    for name, func in benchmarks:
+        results[name] = measure(name, func, bench_args.runs)
+
+    pathlib.Path(settings_file.name).unlink()
+    return results
+
+
+def compare_results(results, baseline):
+    print('Comparison with the baseline (current / baseline):')
+    for name, result in results.items():
+        baseline_result = baseline.get('results', {}).get(name, None)
+        if baseline_result is None:
+            continue
+        ratio = result['median_ms'] / max(baseline_result['median_ms'], 1e-9)
+        print('{:<24} median {:6.2f}x'.format(name, ratio))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the reminder decision hot path')
+    parser.add_argument('--schedule-items', type=int, default=300,
+                        help='Number of schedule items')
+    parser.add_argument('--reminders', type=int, default=24,
+                        help='Number of reminders of each schedule item')
+    parser.add_argument('--routes', type=int, default=30,
+                        help='Number of (orig, dest) pairs')
+    parser.add_argument('--trains', type=int, default=150,
+                        help='Number of trains of each route in a day')
+    parser.add_argument('--reminder-engine', type=str, default='auto',
+                        choices=['auto', 'python', 'numpy'],
+                        help='Engine to evaluate the reminder windows')
+    parser.add_argument('--runs', type=int, default=10,
+                        help='Number of runs of each benchmark')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed of the synthetic data')
+    parser.add_argument('--output', type=str,
+                        help='Path to save the results as JSON')
+    parser.add_argument('--compare', type=str,
+                        help='Path of the results to compare with')
+    bench_args = parser.parse_args()
+
+    # Silence the per-tick logs
+    logging.disable(logging.INFO)
+
+    results = run_benchmarks(bench_args)
+
+    output = bench_args.output
+    if output is None:
+        output = 'benchmarks/results/{}.json'.format(
+            datetime.datetime.now().strftime('%Y%m%d-%H%M%S'))
+    output_path = pathlib.Path(output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(output_path), 'w', encoding='utf-8') as f:
+        json.dump({
+            'created': datetime.datetime.now().isoformat(),
+            'params': vars(bench_args),
+            'results': results,
+        }, f, indent=2)
+    print('Saved the results to {}'.format(output_path))
+
+    if bench_args.compare is not None:
+        with open(bench_args.compare, 'r', encoding='utf-8') as f:
+            compare_results(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
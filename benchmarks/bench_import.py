@@ -0,0 +1,145 @@
+"""
+Benchmarks the start of the CLI entry point, and fails if importing it takes
+longer than the budget or loads the heavy optional dependencies.
+
+Examples:
+* `python benchmarks/bench_import.py`
+* `python benchmarks/bench_import.py --budget-ms=150 --runs=20`
+
+The import time is measured with `-X importtime`, which needs Python 3.7 or
+newer, and is skipped on the older interpreters.
+"""
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+ENTRY_MODULE = 'thsr_voice_reminder.main'
+
+# Only imported on the first use, never when starting
+LAZY_MODULES = ['gtts', 'vlc', 'requests', 'yaml', 'numpy', 'watchdog',
+                'pyttsx3']
+
+# Prints the loaded lazy modules after importing the entry point
+CHECK_CODE = '''
+import sys
+import {}
+print(','.join(name for name in {!r} if name in sys.modules))
+'''.format(ENTRY_MODULE, LAZY_MODULES)
+
+
+def run_python(code, *options):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [str(ROOT_DIR)] + env.get('PYTHONPATH', '').split(os.pathsep))
+    return subprocess.run(
+        [sys.executable] + list(options) + ['-c', code],
+        check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        env=env, universal_newlines=True)
+
+
+def measure_wall_time(code, runs):
+    times = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        run_python(code)
+        times.append(time.perf_counter() - start_time)
+    return times
+
+
+def measure_import_time(runs):
+    """
+    Measures the cumulative import time of the entry point reported by
+    `-X importtime`, which excludes the interpreter start. Returns an empty
+    list if the interpreter doesn't support it.
+    """
+    times = []
+    if sys.version_info < (3, 7):
+        return times
+
+    for _ in range(runs):
+        r = run_python('import {}'.format(ENTRY_MODULE), '-X', 'importtime')
+        for line in r.stderr.splitlines():
+            parts = line.split('|')
+            if len(parts) == 3 and parts[2].strip() == ENTRY_MODULE:
+                # Microseconds -> seconds
+                times.append(int(parts[1]) / 1e6)
+    return times
+
+
+def summarize(times):
+    return {
+        'median_ms': statistics.median(times) * 1e3,
+        'min_ms': min(times) * 1e3,
+        'max_ms': max(times) * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the start of the CLI entry point')
+    parser.add_argument('--runs', type=int, default=10,
+                        help='Number of runs of each benchmark')
+    parser.add_argument('--budget-ms', type=float, default=60,
+                        help=('Budget of the median import time of the'
+                              ' entry point in milliseconds'))
+    parser.add_argument('--output', type=str,
+                        help='Path to save the results as JSON')
+    bench_args = parser.parse_args()
+
+    results = {
+        'interpreter': summarize(measure_wall_time('pass', bench_args.runs)),
+        'start': summarize(measure_wall_time(
+            'import {}'.format(ENTRY_MODULE), bench_args.runs)),
+    }
+    import_times = measure_import_time(bench_args.runs)
+    if import_times:
+        results['import'] = summarize(import_times)
+    else:
+        print('Skip the import time, -X importtime needs Python 3.7+')
+    for name, result in results.items():
+        print('{:<12} median {:8.2f}ms, min {:8.2f}ms, max {:8.2f}ms'.format(
+            name, result['median_ms'], result['min_ms'], result['max_ms']))
+
+    loaded_modules = [name for name
+                      in run_python(CHECK_CODE).stdout.strip().split(',')
+                      if name]
+
+    output = bench_args.output
+    if output is None:
+        output = 'benchmarks/results/import-{}.json'.format(
+            datetime.datetime.now().strftime('%Y%m%d-%H%M%S'))
+    output_path = pathlib.Path(output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(output_path), 'w', encoding='utf-8') as f:
+        json.dump({
+            'created': datetime.datetime.now().isoformat(),
+            'params': vars(bench_args),
+            'results': results,
+            'loaded_modules': loaded_modules,
+        }, f, indent=2)
+    print('Saved the results to {}'.format(output_path))
+
+    is_ok = True
+    if loaded_modules:
+        print('Loaded lazy modules when starting: {}'.format(
+            ', '.join(loaded_modules)))
+        is_ok = False
+    if ('import' in results
+            and results['import']['median_ms'] > bench_args.budget_ms):
+        print('Import time is over the budget of {}ms'.format(
+            bench_args.budget_ms))
+        is_ok = False
+    if not is_ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""
+Serves the recorded THSR API responses in place of the PTX service, with
+injectable latency, errors and rate limiting.
+
+Record the responses first by running the program with
+`--api-record-dir=benchmarks/recordings`, then point the program to the
+stand-in with `--api-base-url=http://127.0.0.1:8080/MOTC/v2/Rail/THSR`.
+
+Examples:
+* `python benchmarks/ptx_standin.py --record-dir=benchmarks/recordings`
+* `python benchmarks/ptx_standin.py --latency=0.2 --jitter=0.1`
+* `python benchmarks/ptx_standin.py --error-rate=0.1 --rate-limit=5`
+"""
+import argparse
+import collections
+import email.utils
+import hashlib
+import http.server
+import pathlib
+import random
+import socketserver
+import sys
+import threading
+import time
+
+# Run from the repository root without installing the package
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from thsr_voice_reminder.api_recording import ApiRecording  # noqa: E402
+
+
+class Recordings:
+    """
+    Finds the recorded responses of the API paths.
+    """
+
+    def __init__(self, record_dir):
+        self._record_dir = pathlib.Path(record_dir)
+        self._lock = threading.Lock()
+        # Name -> (content, ETag, Last-Modified)
+        self._responses = {}
+
+    def get(self, path):
+        name = ApiRecording.get_name(path)
+        with self._lock:
+            if name not in self._responses:
+                self._responses[name] = self._load(name)
+            return self._responses[name]
+
+    def _load(self, name):
+        record_path = self._record_dir / name
+        if not record_path.exists():
+            # Replay the responses recorded on another day
+            pattern = ApiRecording.get_name_without_date(name)
+            candidates = sorted(self._record_dir.glob(pattern))
+            if not candidates:
+                return None
+            record_path = candidates[-1]
+
+        content = record_path.read_bytes()
+        etag = '"{}"'.format(hashlib.sha256(content).hexdigest()[:16])
+        last_modified = email.utils.formatdate(
+            record_path.stat().st_mtime, usegmt=True)
+        return (content, etag, last_modified)
+
+
+class RateLimiter:
+    """
+    Allows at most the number of requests in every second.
+    """
+
+    def __init__(self, max_requests_per_sec):
+        self._max_requests_per_sec = max_requests_per_sec
+        self._lock = threading.Lock()
+        self._request_times = collections.deque()
+
+    def allow(self):
+        if self._max_requests_per_sec <= 0:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            while self._request_times and now - self._request_times[0] >= 1:
+                self._request_times.popleft()
+            if len(self._request_times) >= self._max_requests_per_sec:
+                return False
+            self._request_times.append(now)
+            return True
+
+
+class StandinHandler(http.server.BaseHTTPRequestHandler):
+    # Set by create_server()
+    standin_args = None
+    recordings = None
+    rate_limiter = None
+    rng = None
+    rng_lock = None
+    stats = None
+    stats_lock = None
+
+    def do_GET(self):
+        self._delay()
+
+        if not self.rate_limiter.allow():
+            self._send_status(429, 'rate_limited')
+            return
+        if self._random() < self.standin_args.error_rate:
+            self._send_status(500, 'errors')
+            return
+
+        path = self.path.split('?', 1)[0]
+        base_path = self.standin_args.base_path
+        if not path.startswith(base_path):
+            self._send_status(404, 'not_found')
+            return
+
+        response = self.recordings.get(path[len(base_path):])
+        if response is None:
+            self._send_status(404, 'not_found')
+            return
+
+        (content, etag, last_modified) = response
+        if self.headers.get('If-None-Match', None) == etag:
+            self._send_status(304, 'not_modified', etag=etag)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        self.wfile.write(content)
+        self._count('ok')
+
+    def log_message(self, format, *args):
+        if self.standin_args.verbose:
+            super().log_message(format, *args)
+
+    def _delay(self):
+        latency = self.standin_args.latency
+        if self.standin_args.jitter > 0:
+            latency += self._random() * self.standin_args.jitter
+        if latency > 0:
+            time.sleep(latency)
+
+    def _random(self):
+        # Keep the injected failures reproducible with the seed
+        with self.rng_lock:
+            return self.rng.random()
+
+    def _send_status(self, code, stat_name, etag=None):
+        self.send_response(code)
+        if code == 429:
+            self.send_header('Retry-After', '1')
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        self._count(stat_name)
+
+    def _count(self, stat_name):
+        with self.stats_lock:
+            self.stats[stat_name] += 1
+
+
+class StandinServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """
+    Handles each request in a thread, like http.server.ThreadingHTTPServer
+    which needs Python 3.7+.
+    """
+    daemon_threads = True
+
+
+def create_server(standin_args):
+    """
+    Creates the stand-in server, the statistics of the responses are kept in
+    `server.stats`.
+    """
+    handler_class = type('Handler', (StandinHandler,), {
+        'standin_args': standin_args,
+        'recordings': Recordings(standin_args.record_dir),
+        'rate_limiter': RateLimiter(standin_args.rate_limit),
+        'rng': random.Random(standin_args.seed),
+        'rng_lock': threading.Lock(),
+        'stats': collections.Counter(),
+        'stats_lock': threading.Lock(),
+    })
+    server = StandinServer(
+        (standin_args.host, standin_args.port), handler_class)
+    server.stats = handler_class.stats
+    return server
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description='Replay the recorded THSR API responses')
+    parser.add_argument('--record-dir', type=str,
+                        default='benchmarks/recordings',
+                        help='Directory of the recorded responses')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                        help='Host to listen on')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='Port to listen on, 0 to pick a free port')
+    parser.add_argument('--base-path', type=str,
+                        default='/MOTC/v2/Rail/THSR',
+                        help='Path prefix of the API')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Latency of each response in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Maximum random latency added in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Ratio of the requests failed with 500')
+    parser.add_argument('--rate-limit', type=int, default=0,
+                        help=('Maximum requests per second before'
+                              ' responding 429, 0 for no limit'))
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed of the latency and errors')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Log each request')
+    return parser
+
+
+def main():
+    standin_args = create_parser().parse_args()
+
+    server = create_server(standin_args)
+    (host, port) = server.server_address[:2]
+    print('Serving {} on http://{}:{}{}'.format(
+        standin_args.record_dir, host, port, standin_args.base_path))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print('Responses: {}'.format(dict(server.stats)))
+
+
+if __name__ == '__main__':
+    main()
@@ -165,6 +165,9 @@ setup(
     extras_require={  # Optional
         'dev': ['check-manifest'],
         'test': ['coverage'],
+        'watch': ['watchdog'],
+        'offline': ['pyttsx3'],
+        'fast': ['numpy'],
     },
 
     # If there are data files included in your packages that need to be
@@ -1,16 +1,26 @@
 import datetime
 
 from thsr_voice_reminder.base import Base
+from thsr_voice_reminder.clock import Clock
 from thsr_voice_reminder.time_utils import TimeUtils
 
 
 class ActionGenerator(Base):
-    def __init__(self, args, app_settings):
+    # The lower number is announced first
+    ALERT_PRIORITY = 0
+    REMINDER_PRIORITY = 1
+
+    def __init__(self, args, app_settings, clock=None):
         super().__init__(self, args)
 
         self._app_settings = app_settings
 
-    def generate_reminder_action(self, schedule_item, target_train, reminder):
+        if clock is None:
+            clock = Clock()
+        self._clock = clock
+
+    def generate_reminder_action(self, schedule_item, target_train, reminder,
+                                 now_num=None):
         self._logger.debug(
             'schedule_item={}, target_train={}, reminder={}'.format(
                 schedule_item, target_train, reminder))
@@ -19,7 +29,9 @@ class ActionGenerator(Base):
 
         occasion_target = schedule_item.get_occasion_target()
 
-        now_num = TimeUtils.get_cur_time_num()
+        now = self._clock.now()
+        if now_num is None:
+            now_num = TimeUtils.get_cur_time_num(now)
 
         m['before_min'] = TimeUtils.calc_time_diff(
             target_train.get_occasion(occasion_target), now_num)
@@ -63,10 +75,18 @@ class ActionGenerator(Base):
         m['dest_station_name'] = dest_station_name['En']
         m['dest_station_name_tw'] = dest_station_name['Zh_tw']
 
+        # The action is stale once the reminder window closes
+        target_time = target_train.get_occasion_num(occasion_target)
+        (_, last_remind_time) = reminder.get_remind_time_range(target_time)
+        expire_time = TimeUtils.num_to_timestamp(last_remind_time + 1, now)
+
         return {
+            'priority': self.REMINDER_PRIORITY,
+            'expire_time': expire_time,
             'sound_before': reminder.get_sound_before(),
             'voice': {
                 'message': reminder.get_formatted_voice_message(m),
+                'segments': reminder.get_formatted_voice_segments(m),
                 'lang': reminder.get_voice_lang(),
             },
         }
@@ -87,6 +107,8 @@ class ActionGenerator(Base):
             ])
 
         return {
+            'priority': self.ALERT_PRIORITY,
+            'expire_time': None,
             'sound_before': self._app_settings.get_alert_sound(),
             'voice': {
                 'message': message,
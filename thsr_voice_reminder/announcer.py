@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+from queue import PriorityQueue
+import itertools
+
+from thsr_voice_reminder.action_generator import ActionGenerator
+from thsr_voice_reminder.base import Base
+from thsr_voice_reminder.clock import Clock
+
+
+class Announcer(Base):
+    def __init__(self, args, voice, sound, clock=None):
+        super().__init__(self, args)
+
+        self._voice = voice
+        self._sound = sound
+
+        if clock is None:
+            clock = Clock()
+        self._clock = clock
+
+        self._init_process_state()
+
+    def enqueue(self, actions):
+        """
+        Queues the actions without blocking, the actions with the higher
+        priority (the lower number) are announced first.
+        """
+        for action in actions:
+            priority = action.get('priority',
+                                  ActionGenerator.REMINDER_PRIORITY)
+            # Keep the order of the actions with the same priority
+            self._action_queue.put((priority, next(self._counter), action))
+
+    def close(self):
+        """
+        Drops the queued actions and stops the announcing thread.
+        """
+        self._is_closed = True
+        # Put ahead of all the actions to wake up the announcing thread
+        self._action_queue.put((-1, next(self._counter), None))
+        self._executor.shutdown(wait=False)
+
+    def _init_process_state(self):
+        self._is_closed = False
+        self._action_queue = PriorityQueue()
+        self._counter = itertools.count()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._executor.submit(self._announce)
+
+    def _announce(self):
+        while True:
+            (_, _, action) = self._action_queue.get()
+            if self._is_closed:
+                return
+
+            try:
+                if self._is_stale(action):
+                    self._logger.info('Drop stale action: {}'.format(action))
+                    continue
+
+                # Synthesize the speech and queue it to be played
+                self._voice.make_voice([action])
+                # Take the next action only after this one is played, so
+                # its priority and staleness are checked right before it
+                # plays instead of before queueing the clips
+                self._sound.wait_until_played()
+            except:
+                self._logger.exception('Unable to announce the action')
+                self._sound.notify_error()
+
+    def _is_stale(self, action):
+        expire_time = action.get('expire_time', None)
+        # The expire time is derived from the clock of the actions
+        return expire_time is not None and self._clock.time() > expire_time
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import pathlib
+import re
+import tempfile
+import time
+
+from thsr_voice_reminder.base import Base
+
+
+class ApiCache(Base):
+    def __init__(self, args):
+        super().__init__(self, args)
+
+        self._init_cache_dir()
+
+    def get(self, key, max_age):
+        """
+        Gets the cached data of the key, or None if the cache doesn't exist,
+        has expired or is corrupted.
+        """
+        if self._cache_dir is None:
+            return None
+
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as f:
+                # json.loads only takes bytes since Python 3.6
+                entry = json.loads(f.read().decode('utf-8'))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            self._logger.warning('Unable to read cache {}'.format(path))
+            self._remove(path)
+            return None
+
+        if not self._check_integrity(key, entry):
+            self._logger.warning('Corrupted cache {}'.format(path))
+            self._remove(path)
+            return None
+
+        if time.time() - entry['created'] > max_age:
+            self._logger.debug('Expired cache {}'.format(path))
+            return None
+
+        self._logger.debug('Read cache {}'.format(path))
+        return entry['data']
+
+    def get_nearest(self, key):
+        """
+        Gets the cached data of the key regardless of its age. If the key
+        ends with a date which is not cached, gets the data of the latest
+        cached date instead, or None if there is none.
+        """
+        if self._cache_dir is None:
+            return None
+
+        data = self.get(key, float('inf'))
+        if data is not None:
+            return data
+
+        date_pattern = r'\d{4}-\d{2}-\d{2}$'
+        if not re.match(date_pattern, str(key[-1])):
+            return None
+
+        # The dates in the file names sort in the chronological order
+        name = pathlib.Path(self._get_path(key)).stem
+        pattern = re.sub(date_pattern, '*', name) + '.json'
+        for path_obj in sorted(self._cache_dir.glob(pattern), reverse=True):
+            other_date = path_obj.stem.rsplit('_', 1)[-1]
+            data = self.get(key[:-1] + (other_date,), float('inf'))
+            if data is not None:
+                self._logger.debug('Read cache of {} for {}'.format(
+                    other_date, key[-1]))
+                return data
+        return None
+
+    def put(self, key, data):
+        if self._cache_dir is None:
+            return
+
+        entry = {
+            'key': list(key),
+            'created': time.time(),
+            'checksum': ApiCache._calc_checksum(data),
+            'data': data,
+        }
+
+        # Write to a temporary file first so readers never see partial files
+        path = self._get_path(key)
+        f = tempfile.NamedTemporaryFile(
+            mode='w', encoding='utf-8', dir=str(self._cache_dir),
+            suffix='.tmp', delete=False)
+        try:
+            with f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(f.name, path)
+        except OSError:
+            self._logger.exception('Unable to write cache {}'.format(path))
+            self._remove(f.name)
+
+    def _init_cache_dir(self):
+        cache_dir = self._args.api_cache_dir
+        if not cache_dir:
+            self._cache_dir = None
+            return
+
+        self._cache_dir = pathlib.Path(cache_dir)
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _get_path(self, key):
+        # Keep the file name readable but safe on every platform
+        parts = [re.sub(r'[^\w-]', '-', str(part)) for part in key]
+        return str(self._cache_dir / '{}.json'.format('_'.join(parts)))
+
+    def _check_integrity(self, key, entry):
+        if not isinstance(entry, dict):
+            return False
+        if entry.get('key', None) != list(key):
+            return False
+        if not isinstance(entry.get('created', None), (int, float)):
+            return False
+        checksum = ApiCache._calc_checksum(entry.get('data', None))
+        return entry.get('checksum', None) == checksum
+
+    def _remove(self, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _calc_checksum(data):
+        content = json.dumps(data, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
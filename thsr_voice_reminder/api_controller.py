@@ -1,35 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
 import datetime
-import time
+import threading
 
+from thsr_voice_reminder.api_cache import ApiCache
 from thsr_voice_reminder.base import Base
+from thsr_voice_reminder.clock import Clock
+from thsr_voice_reminder.network_timetable import NetworkTimetable
 from thsr_voice_reminder.thsr_api import ThsrApi
+from thsr_voice_reminder.time_utils import TimeUtils
+from thsr_voice_reminder.timetable_index import TimetableIndex
 
 
 class ApiController(Base):
     # 60 minutes
     UPDATE_API_INTERVAL = 60 * 60
-
-    def __init__(self, args):
+    # 7 days
+    STATION_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+    # 1 day, the timetable cache is also keyed by the date
+    TIMETABLE_CACHE_MAX_AGE = 24 * 60 * 60
+    # 5 minutes
+    UPDATE_ALERT_INFO_INTERVAL = 5 * 60
+    # 5 minutes
+    ALERT_INFO_CACHE_MAX_AGE = 5 * 60
+
+    def __init__(self, args, clock=None, offline=False):
         super().__init__(self, args)
 
+        if clock is None:
+            clock = Clock()
+        self._clock = clock
+        # Only read the cache and never call the API
+        self._offline = offline
+
         self._api = ThsrApi(self._args)
+        self._cache = ApiCache(self._args)
 
+        self._init_executor()
         self._init_update_status()
         self._init_cached_api_data()
 
     def update(self, stations_set, force=False):
-        now = time.time()
-        if force or (now - self._last_update > self.UPDATE_API_INTERVAL):
-            self._logger.info('Update API data')
-
+        date = self._clock.tick()
+        now = date.timestamp()
+        # The timetables of yesterday are useless after midnight
+        is_timetable_due = (now > self._get_next_timetable_update_time()
+                            or date.date() != self._timetable_date)
+        is_alert_info_due = (now - self._last_alert_info_update
+                             > self.UPDATE_ALERT_INFO_INTERVAL)
+        update_timetables = force or is_timetable_due
+        update_alert_info = (force or is_alert_info_due
+                             or not self._has_tried_alert_info)
+        new_stations_set = self._get_new_stations_set(stations_set)
+        if (not update_timetables and not update_alert_info
+                and not new_stations_set):
+            return
+
+        # The periodic updates always go to the network to catch the
+        # changes, the cache only stands in for the latest update
+        if not self._offline:
             self._api.init_api()
-            self._update_api_data(stations_set)
 
-            self._last_update = time.time()
+        # Fetch the alert info and the timetables concurrently
+        if update_alert_info:
+            self._logger.debug('Update alert info')
+            alert_info_future = self._executor.submit(
+                self._read_alert_info, not is_alert_info_due)
+
+        if update_timetables:
+            self._logger.info('Update timetables')
+            timetables = self._read_timetables(
+                stations_set, date, not is_timetable_due)
+            self._update_timetables(timetables)
+            self._last_update = now
+            self._timetable_date = date.date()
+        elif new_stations_set:
+            # Only fetch the routes added to the settings
+            self._logger.info('Update timetables of new routes {}'.format(
+                new_stations_set))
+            timetables = self._read_timetables(new_stations_set, date, True)
+            self._update_timetables(timetables, is_partial=True)
+
+        if update_alert_info:
+            # The alert info is optional, keep the last one and retry on the
+            # next alert cadence instead of blocking the reminders
+            try:
+                self._update_alert_info(alert_info_future.result())
+            except Exception:
+                self._logger.exception('Unable to update alert info')
+            self._has_tried_alert_info = True
+            self._last_alert_info_update = now
+
+    def get_next_update_time(self):
+        return min(self._get_next_timetable_update_time(),
+                   self._last_alert_info_update
+                   + self.UPDATE_ALERT_INFO_INTERVAL)
 
     def get_timetable(self, orig_and_dest):
+        return self._timetable[orig_and_dest].get_trains()
+
+    def get_timetable_index(self, orig_and_dest):
         return self._timetable[orig_and_dest]
 
+    def get_timetable_version(self):
+        """
+        Gets the version which changes whenever the timetables are updated.
+        """
+        return self._timetable_version
+
     def get_alert_info(self):
         return self._alert_info
 
@@ -38,29 +115,131 @@ class ApiController(Base):
         self._has_new_alert_info = False
         return has_new_alert_info
 
+    def _init_executor(self):
+        # Limit the number of concurrent requests to respect the rate limit
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._args.api_max_workers)
+
     def _init_update_status(self):
-        self._last_update = time.time()
+        now = self._clock.timestamp()
+        self._last_update = now
+        self._last_alert_info_update = now
+        self._timetable_date = self._clock.now().date()
+        self._stations_lock = threading.Lock()
+
+    def _get_next_timetable_update_time(self):
+        # The timetable of the whole network is only fetched once a day
+        if self._args.timetable_source == 'train_date':
+            return TimeUtils.get_next_day_timestamp(
+                datetime.datetime.fromtimestamp(self._last_update))
+        return self._last_update + self.UPDATE_API_INTERVAL
 
     def _init_cached_api_data(self):
+        self._network_timetable = None
         self._timetable = None
+        self._timetable_version = 0
         self._alert_info = None
+        self._has_tried_alert_info = False
         self._has_new_alert_info = False
 
-    def _update_api_data(self, stations_set):
-        self._update_timetables(stations_set)
-        self._update_alert_info()
+    def _read_timetables(self, stations_set, date, use_cache):
+        # Derive every route from the timetable of the whole network
+        if self._args.timetable_source == 'train_date':
+            network_timetable = self._read_network_timetable(date, use_cache)
+            return {orig_and_dest: network_timetable.get_trains(*orig_and_dest)
+                    for orig_and_dest in stations_set}
 
-    def _update_timetables(self, stations_set):
-        date = datetime.datetime.today()
-        self._timetable = {}
+        timetable_futures = {}
         for orig_and_dest in stations_set:
-            (station_orig, station_dest) = orig_and_dest
-            trains = self._api.read_timetable(station_orig, station_dest, date)
-            self._timetable[orig_and_dest] = trains
-
-    def _update_alert_info(self):
-        new_alert_info = self._api.read_alert_info()
-
+            timetable_futures[orig_and_dest] = self._executor.submit(
+                self._read_timetable, orig_and_dest, date, use_cache)
+        return {orig_and_dest: future.result()
+                for orig_and_dest, future in timetable_futures.items()}
+
+    def _read_timetable(self, orig_and_dest, date, use_cache):
+        (station_orig, station_dest) = orig_and_dest
+        key = ('timetable', station_orig, station_dest,
+               date.strftime('%Y-%m-%d'))
+
+        def read_from_api():
+            self._init_stations()
+            return self._api.read_timetable_list(
+                station_orig, station_dest, date)
+
+        timetable_list = self._read_with_cache(
+            key, self.TIMETABLE_CACHE_MAX_AGE, use_cache, read_from_api)
+        return ThsrApi.parse_timetable(timetable_list)
+
+    def _read_network_timetable(self, date, use_cache):
+        # Derive the new routes from the timetable of the day in the memory
+        if (use_cache and self._network_timetable is not None
+                and self._network_timetable[0] == date.date()):
+            return self._network_timetable[1]
+
+        key = ('train_date', date.strftime('%Y-%m-%d'))
+        train_date_list = self._read_with_cache(
+            key, self.TIMETABLE_CACHE_MAX_AGE, use_cache,
+            lambda: self._api.read_train_date_list(date))
+        network_timetable = NetworkTimetable(train_date_list)
+        self._network_timetable = (date.date(), network_timetable)
+        return network_timetable
+
+    def _read_alert_info(self, use_cache):
+        try:
+            alert_list = self._read_with_cache(
+                ('alert_info',), self.ALERT_INFO_CACHE_MAX_AGE, use_cache,
+                self._api.read_alert_list)
+        except ValueError:
+            # The alert info is optional when replaying the cache
+            if not self._offline:
+                raise
+            alert_list = []
+        return ThsrApi.parse_alert_info(alert_list)
+
+    def _init_stations(self):
+        # The stations are only needed to map the names for the API
+        with self._stations_lock:
+            if self._api.has_stations():
+                return
+
+            station_list = self._read_with_cache(
+                ('station',), self.STATION_CACHE_MAX_AGE, True,
+                self._api.read_station_list)
+            self._api.set_stations(station_list)
+
+    def _read_with_cache(self, key, max_age, use_cache, read_from_api):
+        if self._offline:
+            data = self._cache.get_nearest(key)
+            if data is None:
+                raise ValueError('No cached API data of {}'.format(key))
+            return data
+
+        if use_cache:
+            data = self._cache.get(key, max_age)
+            if data is not None:
+                return data
+
+        data = read_from_api()
+        self._cache.put(key, data)
+        return data
+
+    def _get_new_stations_set(self, stations_set):
+        if self._timetable is None:
+            return set(stations_set)
+        return set(stations_set) - set(self._timetable.keys())
+
+    def _update_timetables(self, timetables, is_partial=False):
+        # Replace the dict instead of changing it for the other readers
+        if is_partial and self._timetable is not None:
+            timetable = dict(self._timetable)
+        else:
+            timetable = {}
+        for orig_and_dest, trains in timetables.items():
+            timetable[orig_and_dest] = TimetableIndex(trains)
+        self._timetable = timetable
+        self._timetable_version += 1
+
+    def _update_alert_info(self, new_alert_info):
         # Check for new alert info
         if new_alert_info != self._alert_info and self._alert_info is not None:
             self._logger.debug('New alert info: {}'.format(self._alert_info))
@@ -0,0 +1,31 @@
+import pathlib
+import re
+
+
+class ApiRecording:
+    @staticmethod
+    def get_name(path):
+        """
+        Gets the file name of the recorded response of the API path, e.g.,
+        "/DailyTimetable/OD/1000/to/1070/2019-10-01" becomes
+        "DailyTimetable_OD_1000_to_1070_2019-10-01.json".
+        """
+        parts = [part for part in path.split('/') if len(part) > 0]
+        name = '_'.join(parts)
+        return re.sub(r'[^\w-]', '-', name) + '.json'
+
+    @staticmethod
+    def get_name_without_date(name):
+        """
+        Gets the name with the date replaced by a wildcard, so the responses
+        recorded on another day can be replayed.
+        """
+        return re.sub(r'\d{4}-\d{2}-\d{2}', '*', name)
+
+    @staticmethod
+    def save(record_dir, path, content):
+        record_dir_obj = pathlib.Path(record_dir)
+        record_dir_obj.mkdir(parents=True, exist_ok=True)
+        with open(str(record_dir_obj / ApiRecording.get_name(path)),
+                  'wb') as f:
+            f.write(content)
@@ -1,4 +1,7 @@
-import yaml
+import hashlib
+import json
+import os
+import string
 
 from thsr_voice_reminder.base import Base
 
@@ -16,24 +19,75 @@ class AppSettings(Base):
         for schedule_item in self._schedule_items:
             yield schedule_item
 
+    def get_sound_paths(self):
+        """
+        Gets the paths of all the sounds used by the settings.
+        """
+        paths = set()
+        for schedule_item in self.iterate_schedule_items():
+            for reminder in schedule_item.iterate_reminders():
+                paths.add(reminder.get_sound_before())
+        paths.add(self.get_alert_sound())
+        paths.discard(None)
+        return paths
+
     def get_alert_sound(self):
         alert = self._settings.get('alert', {})
         return alert.get('sound', None)
 
     def load(self):
-        with open(self._args.settings, 'r', encoding='utf-8') as stream:
-            try:
-                self._settings = yaml.safe_load(stream)
-            except yaml.YAMLError:
-                self._logger.exception('Unable to read the settings file')
-                raise
+        # Skip reading the file if its stat has not changed
+        stat = AppSettings.stat_settings_file(self._args.settings)
+        if stat is not None and stat == self._last_stat:
+            self._has_settings_changed = False
+            return
+
+        with open(self._args.settings, 'rb') as stream:
+            content = stream.read()
+
+        # Skip parsing the file if its content has not changed
+        content_hash = hashlib.sha256(content).hexdigest()
+        if content_hash == self._last_content_hash:
+            self._last_stat = stat
+            self._has_settings_changed = False
+            return
+
+        # Parsing is the only use of YAML, don't load it at the start
+        import yaml
+
+        try:
+            self._settings = yaml.safe_load(content.decode('utf-8'))
+        except yaml.YAMLError:
+            self._logger.exception('Unable to read the settings file')
+            raise
+
+        self._last_stat = stat
+        self._last_content_hash = content_hash
 
         self._update_settings_change()
-        self._build_schedule_items()
+        if self._has_settings_changed:
+            self._build_schedule_items()
+
+    @staticmethod
+    def stat_settings_file(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def invalidate(self):
+        """
+        Forgets the last loaded file, so the next load parses the file and
+        rebuilds everything even if it has not changed.
+        """
+        self._init_settings_state()
 
     def _init_settings_state(self):
         self._last_settings = None
         self._has_settings_changed = False
+        self._last_stat = None
+        self._last_content_hash = None
 
     def _update_settings_change(self):
         self._has_settings_changed = (self._settings != self._last_settings)
@@ -43,8 +97,37 @@ class AppSettings(Base):
 
     def _build_schedule_items(self):
         obj_list = self._settings.get('schedule', [])
-        self._schedule_items = [ScheduleItem(index, obj)
-                                for index, obj in enumerate(obj_list)]
+        # Leave the reminders out, so editing a reminder keeps the key of
+        # the schedule item
+        keys = AppSettings.calc_keys(
+            [{name: value for name, value in obj.items()
+              if name != 'reminders'}
+             for obj in obj_list])
+        self._schedule_items = [ScheduleItem(index, obj, key)
+                                for index, (obj, key)
+                                in enumerate(zip(obj_list, keys))]
+
+    @staticmethod
+    def calc_keys(obj_list):
+        """
+        Calculates the keys derived from the contents of the objects, so the
+        keys stay the same when the objects are reordered. The identical
+        objects are told apart by their occurrences.
+        """
+        keys = []
+        num_occurrences = {}
+        for obj in obj_list:
+            content = json.dumps(obj, ensure_ascii=False, sort_keys=True,
+                                 default=str)
+            digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+            occurrence = num_occurrences.get(digest, 0)
+            num_occurrences[digest] = occurrence + 1
+            if occurrence > 0:
+                keys.append('{}-{}'.format(digest, occurrence))
+            else:
+                keys.append(digest)
+        return keys
 
     def __eq__(self, other):
         if other is None:
@@ -53,19 +136,26 @@ class AppSettings(Base):
 
 
 class ScheduleItem:
-    def __init__(self, index, obj):
+    def __init__(self, index, obj, key):
         self._index = index
         self._obj = obj
+        self._key = key
 
         self._build_reminders()
 
     def get_index(self):
         return self._index
 
+    def get_key(self):
+        return self._key
+
     def iterate_reminders(self):
         for reminder in self._reminders:
             yield reminder
 
+    def get_label(self):
+        return self._obj.get('label', '')
+
     def get_orig_dest(self):
         return (self._obj['orig'], self._obj['dest'])
 
@@ -86,8 +176,10 @@ class ScheduleItem:
 
     def _build_reminders(self):
         obj_list = self._obj.get('reminders', [])
-        self._reminders = [Reminder(index, obj)
-                           for index, obj in enumerate(obj_list)]
+        keys = AppSettings.calc_keys(obj_list)
+        self._reminders = [Reminder(index, obj, key)
+                           for index, (obj, key)
+                           in enumerate(zip(obj_list, keys))]
 
     def __eq__(self, other):
         if other is None:
@@ -99,13 +191,17 @@ class ScheduleItem:
 
 
 class Reminder:
-    def __init__(self, index, obj):
+    def __init__(self, index, obj, key):
         self._index = index
         self._obj = obj
+        self._key = key
 
     def get_index(self):
         return self._index
 
+    def get_key(self):
+        return self._key
+
     def get_remind_time_range(self, target_time):
         first_before_min = self._obj['before_min']
         last_before_min = self._obj.get('last_before_min', 0)
@@ -119,6 +215,10 @@ class Reminder:
     def get_sound_before(self):
         return self._obj.get('sound_before', None)
 
+    def get_voice_message(self):
+        voice = self._obj.get('voice', {})
+        return voice.get('message', '')
+
     def get_formatted_voice_message(self, m):
         voice = self._obj.get('voice', {})
         message = voice.get('message', None)
@@ -127,6 +227,32 @@ class Reminder:
         else:
             return message.format_map(m)
 
+    def get_formatted_voice_segments(self, m):
+        """
+        Splits the formatted voice message into the static segments of the
+        template and the formatted values, so each of them can be
+        synthesized once and reused. Returns None if the voice is not
+        segmented.
+        """
+        voice = self._obj.get('voice', {})
+        message = voice.get('message', None)
+        if message is None or not voice.get('segmented', False):
+            return None
+
+        formatter = string.Formatter()
+        segments = []
+        for (literal_text, field_name, format_spec,
+             conversion) in formatter.parse(message):
+            segments.append(literal_text)
+            if field_name is not None:
+                (value, _) = formatter.get_field(field_name, (), m)
+                value = formatter.convert_field(value, conversion)
+                segments.append(formatter.format_field(value, format_spec))
+
+        # Remove the empty segments between the adjacent fields
+        segments = [segment.strip() for segment in segments]
+        return [segment for segment in segments if len(segment) > 0]
+
     def get_voice_lang(self):
         voice = self._obj.get('voice', {})
         return voice.get('lang', None)
@@ -4,12 +4,19 @@ import pathlib
 
 class Base:
     def __init__(self, child_class, args):
-        child_class_name = type(child_class).__name__
-        self._logger = Base.create_logger(
-            child_class_name, verbose=args.verbose)
+        self._logger_name = type(child_class).__name__
+        self._logger_obj = None
         self._args = args
         self._settings = None
 
+    @property
+    def _logger(self):
+        # Create the logger and its log file only when something is logged
+        if self._logger_obj is None:
+            self._logger_obj = Base.create_logger(
+                self._logger_name, verbose=self._args.verbose)
+        return self._logger_obj
+
     @staticmethod
     def create_logger(name, verbose=False):
         # Set the logging level
@@ -22,6 +29,11 @@ class Base:
         logger = logging.getLogger(name)
         logger.setLevel(level)
 
+        # Reuse the handlers if the logger has been created by another
+        # instance of the same class
+        if logger.handlers:
+            return logger
+
         # Set the logging path
         path = 'logs/{}.log'.format(name)
 
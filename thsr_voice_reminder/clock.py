@@ -0,0 +1,53 @@
+import datetime
+
+
+class Clock:
+    """
+    Reads the current time once for each tick, so every check in the same
+    tick sees the same time.
+    """
+
+    def __init__(self):
+        self._now = None
+
+    def tick(self):
+        self._now = self._read()
+        return self._now
+
+    def now(self):
+        """
+        Gets the time of the current tick.
+        """
+        if self._now is None:
+            return self.tick()
+        return self._now
+
+    def timestamp(self):
+        return self.now().timestamp()
+
+    def time(self):
+        """
+        Reads the current timestamp without changing the time of the tick,
+        for the threads which don't run the ticks.
+        """
+        return self._read().timestamp()
+
+    def _read(self):
+        return datetime.datetime.today()
+
+
+class SimulatedClock(Clock):
+    """
+    Returns the time set by the simulation instead of the real time.
+    """
+
+    def __init__(self, start_time):
+        super().__init__()
+
+        self._simulated_time = start_time
+
+    def set_time(self, simulated_time):
+        self._simulated_time = simulated_time
+
+    def _read(self):
+        return self._simulated_time
@@ -0,0 +1,64 @@
+import copy
+import pathlib
+import time
+
+from thsr_voice_reminder.base import Base
+from thsr_voice_reminder.shared_api_controller import SharedApiController
+from thsr_voice_reminder.tenant import ReminderTenant
+
+
+class ReminderDaemon(Base):
+    # 10 seconds
+    POLL_INTERVAL = 10
+
+    SETTINGS_PATTERNS = ['*.yml', '*.yaml']
+
+    def __init__(self, args):
+        super().__init__(self, args)
+
+        self._shared_api_controller = SharedApiController(self._args)
+
+        self._init_tenants()
+
+    def run_forever(self):
+        self._logger.info('Start running forever with {}'.format(
+            self._args.settings_dir))
+
+        while True:
+            self._update_tenants()
+            self._check_tenants()
+
+            time.sleep(self.POLL_INTERVAL)
+
+    def _init_tenants(self):
+        # Settings path -> tenant
+        self._tenants = {}
+
+    def _update_tenants(self):
+        settings_dir = pathlib.Path(self._args.settings_dir)
+        paths = set()
+        for pattern in self.SETTINGS_PATTERNS:
+            paths |= {str(path) for path in settings_dir.glob(pattern)}
+
+        for path in sorted(paths - set(self._tenants)):
+            self._logger.info('Add tenant {}'.format(path))
+            tenant_args = copy.copy(self._args)
+            tenant_args.settings = path
+            api_controller = \
+                self._shared_api_controller.get_tenant_api_controller(path)
+            self._tenants[path] = ReminderTenant(
+                tenant_args, api_controller=api_controller)
+
+        for path in sorted(set(self._tenants) - paths):
+            self._logger.info('Remove tenant {}'.format(path))
+            self._tenants.pop(path).close()
+            self._shared_api_controller.remove_tenant(path)
+
+    def _check_tenants(self):
+        for path, tenant in self._tenants.items():
+            try:
+                tenant.check_time_and_make_sound()
+            except:
+                # Keep serving the other tenants
+                self._logger.exception(
+                    'Unable to check tenant {}'.format(path))
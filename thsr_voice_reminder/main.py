@@ -1,34 +1,140 @@
 import argparse
+import sys
 import time
 
-from thsr_voice_reminder.app_settings import AppSettings
 from thsr_voice_reminder.base import Base
-from thsr_voice_reminder.main_controller import MainController
-from thsr_voice_reminder.sound import Sound
-from thsr_voice_reminder.voice import Voice
+from thsr_voice_reminder.time_utils import TimeUtils
 
 
 class ThsrVoiceReminder(Base):
+    # 10 seconds
+    POLL_INTERVAL = 10
+
     def __init__(self):
         self._args = self._parse_args()
 
         super().__init__(self, self._args)
 
     def run(self):
-        self._app_settings = AppSettings(self._args)
+        # Each mode only imports the modules it uses, so starting stays fast
+
+        # Validate the settings without the audio and the TTS, and exit
+        if self._args.check:
+            from thsr_voice_reminder.settings_checker import SettingsChecker
+
+            checker = SettingsChecker(self._args)
+            if not checker.check():
+                sys.exit(1)
+            return
+
+        # Print the announcements of the simulated days and exit
+        if self._args.simulate is not None:
+            from thsr_voice_reminder.simulator import Simulator
+
+            simulator = Simulator(self._args)
+            simulator.run()
+            return
+
+        # Print the reminder windows of the day and exit
+        if self._args.show_plan:
+            from thsr_voice_reminder.simulator import Simulator
+
+            simulator = Simulator(self._args)
+            simulator.show_plan()
+            return
+
+        # Serve all the settings files in the directory
+        if self._args.settings_dir is not None:
+            from thsr_voice_reminder.daemon import ReminderDaemon
+
+            daemon = ReminderDaemon(self._args)
+            daemon.run_forever()
+            return
 
-        self._main_controller = MainController(self._args, self._app_settings)
-        self._sound = Sound(self._args)
-        self._voice = Voice(self._args, self._sound)
+        from thsr_voice_reminder.tenant import ReminderTenant
 
-        self._run_forever()
+        self._tenant = ReminderTenant(self._args)
+        self._main_controller = self._tenant.get_main_controller()
+
+        if self._args.scheduler == 'event':
+            self._run_forever_on_events()
+        else:
+            self._run_forever()
 
     def _parse_args(self):
         parser = argparse.ArgumentParser(description='Run THSR voice reminder')
 
         parser.add_argument('--settings', type=str, help='Path of settings')
+        parser.add_argument('--settings-dir', type=str,
+                            help=('Directory of settings files, each of them'
+                                  ' is served as a separate tenant sharing'
+                                  ' the API data'))
         parser.add_argument('--verbose', action='store_true',
                             help='Turn on verbose logging')
+        parser.add_argument('--scheduler', type=str, default='poll',
+                            choices=['poll', 'event'],
+                            help=('Check the reminders every 10 seconds'
+                                  ' (poll) or only when the next reminder'
+                                  ' window opens or something changes'
+                                  ' (event)'))
+        parser.add_argument('--reminder-engine', type=str, default='auto',
+                            choices=['auto', 'python', 'numpy'],
+                            help=('Evaluate the reminder windows one by one'
+                                  ' (python) or all at once with NumPy'
+                                  ' (numpy), auto uses NumPy if it is'
+                                  ' installed'))
+        parser.add_argument('--simulate', type=str,
+                            choices=['day', 'week'],
+                            help=('Replay the whole day or week with the'
+                                  ' cached timetables and print the'
+                                  ' announcements instead of playing them'))
+        parser.add_argument('--simulate-date', type=str,
+                            help=('First date to simulate, show the plan or'
+                                  ' check (YYYY-MM-DD), defaults to today'))
+        parser.add_argument('--show-plan', action='store_true',
+                            help=('Print the reminder windows of the day'
+                                  ' with the cached timetables'))
+        parser.add_argument('--check', action='store_true',
+                            help=('Validate the settings and print the'
+                                  ' target trains resolved from the cached'
+                                  ' timetables, without starting the audio'
+                                  ' or the TTS'))
+        parser.add_argument('--api-base-url', type=str,
+                            default=('https://ptx.transportdata.tw'
+                                     '/MOTC/v2/Rail/THSR'),
+                            help=('Base URL of the THSR API, can point to'
+                                  ' the stand-in server'))
+        parser.add_argument('--api-record-dir', type=str,
+                            help=('Directory to record the API responses,'
+                                  ' which can be replayed by the stand-in'
+                                  ' server'))
+        parser.add_argument('--api-max-workers', type=int, default=4,
+                            help=('Maximum number of concurrent API'
+                                  ' requests'))
+        parser.add_argument('--api-connect-timeout', type=float, default=10,
+                            help='Timeout in seconds to connect to the API')
+        parser.add_argument('--api-read-timeout', type=float, default=30,
+                            help='Timeout in seconds to read from the API')
+        parser.add_argument('--timetable-source', type=str, default='od',
+                            choices=['od', 'train_date'],
+                            help=('Fetch the timetable of each route (od) or'
+                                  ' fetch the timetable of the whole network'
+                                  ' once a day (train_date)'))
+        parser.add_argument('--api-cache-dir', type=str, default='cache/api',
+                            help=('Directory to cache the API data, empty to'
+                                  ' disable the cache'))
+        parser.add_argument('--remind-journal-dir', type=str,
+                            default='cache/state',
+                            help=('Directory to keep the journal of the'
+                                  ' announced reminders, so they are not'
+                                  ' announced again after restarting, empty'
+                                  ' to disable the journal'))
+        parser.add_argument('--tts-cache-dir', type=str, default='cache/tts',
+                            help=('Directory to cache the synthesized'
+                                  ' speech, empty to disable the cache'))
+        parser.add_argument('--tts-backends', type=str, default='gtts',
+                            help=('Comma-separated TTS backends to try in'
+                                  ' order: gtts, espeak, pyttsx3'))
 
         return parser.parse_args()
 
@@ -38,19 +144,39 @@ class ThsrVoiceReminder(Base):
         while True:
             self._check_time_and_make_sound()
 
-            time.sleep(10)
+            time.sleep(self.POLL_INTERVAL)
 
-    def _check_time_and_make_sound(self):
-        try:
-            self._app_settings.load()
+    def _run_forever_on_events(self):
+        self._logger.info('Start running forever on events')
+
+        from thsr_voice_reminder.scheduler import Scheduler
+        from thsr_voice_reminder.settings_watcher import SettingsWatcher
+
+        self._scheduler = Scheduler(self._args)
+        self._settings_watcher = SettingsWatcher(
+            self._args, lambda: self._scheduler.wake('settings'))
+        self._settings_watcher.start()
 
-            actions = self._main_controller.run_and_get_actions()
+        while True:
+            self._check_time_and_make_sound()
 
-            self._voice.make_voice(actions)
-        except:
-            self._logger.exception('Unable to check time and make sound')
-            self._sound.notify_error()
-            raise
+            self._set_scheduler_timers()
+            reasons = self._scheduler.wait()
+            self._logger.debug('Woken up by {}'.format(reasons))
+
+    def _set_scheduler_timers(self):
+        self._scheduler.set_timer(
+            'remind', self._main_controller.get_next_remind_time())
+        self._scheduler.set_timer(
+            'prerender', self._main_controller.get_next_prerender_time())
+        self._scheduler.set_timer(
+            'api', self._main_controller.get_next_api_update_time())
+        # Target trains and active weekdays change on the next day
+        self._scheduler.set_timer(
+            'next_day', TimeUtils.get_next_day_timestamp())
+
+    def _check_time_and_make_sound(self):
+        self._tenant.check_time_and_make_sound()
 
 
 def main():
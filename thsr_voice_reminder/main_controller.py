@@ -1,22 +1,35 @@
-import bisect
-
 from thsr_voice_reminder.action_generator import ActionGenerator
 from thsr_voice_reminder.api_controller import ApiController
 from thsr_voice_reminder.base import Base
+from thsr_voice_reminder.clock import Clock
+from thsr_voice_reminder.remind_journal import RemindJournal
+from thsr_voice_reminder.reminder_engine import ReminderEngine
+from thsr_voice_reminder.reminder_engine import ReminderWindow
+from thsr_voice_reminder.reminder_index import ReminderIndex
 from thsr_voice_reminder.time_utils import TimeUtils
 
 
 class MainController(Base):
     MAX_NUM_ERRORS = 6
+    # 10 seconds
+    RETRY_INTERVAL = 10
+    # 60 minutes
+    PRERENDER_AHEAD_MIN = 60
 
-    def __init__(self, args, app_settings):
+    def __init__(self, args, app_settings, api_controller=None, clock=None):
         super().__init__(self, args)
 
         self._app_settings = app_settings
 
+        if clock is None:
+            clock = Clock()
+        self._clock = clock
+
         self._action_generator = ActionGenerator(
-            self._args, self._app_settings)
-        self._api_controller = ApiController(self._args)
+            self._args, self._app_settings, clock=self._clock)
+        if api_controller is None:
+            api_controller = ApiController(self._args)
+        self._api_controller = api_controller
 
         self._init_stations_set()
         self._init_remind_state()
@@ -26,20 +39,91 @@ class MainController(Base):
     def run_and_get_actions(self):
         self._logger.info('Run and get actions')
 
+        # Read the time once for the whole tick
+        self._clock.tick()
+
         self._reset_states_when_settings_changes()
         self._update_stations_set()
         if not self._try_update_api():
             return []
 
-        reminder_actions = self._generate_reminder_actions()
+        reminder_actions = self.generate_reminder_actions()
         alert_actions = self._generate_alert_info()
         return reminder_actions + alert_actions
 
+    def get_next_remind_time(self):
+        """
+        Gets the timestamp when the next reminder window opens today, or None
+        if there is no more reminder today.
+        """
+        if self._num_errors > 0:
+            return self._clock.timestamp() + self.RETRY_INTERVAL
+        if self._reminder_index is None:
+            return None
+
+        now = self._clock.now()
+        next_remind_time = self._reminder_index.find_next_window_time(
+            TimeUtils.get_cur_time_num(now))
+
+        if next_remind_time is None:
+            return None
+        else:
+            return TimeUtils.num_to_timestamp(next_remind_time, now)
+
+    def get_next_prerender_time(self):
+        next_remind_time = self.get_next_remind_time()
+        if next_remind_time is None:
+            return None
+
+        prerender_time = next_remind_time - 60 * self.PRERENDER_AHEAD_MIN
+        if prerender_time <= self._clock.timestamp():
+            return None
+        else:
+            return prerender_time
+
+    def get_upcoming_actions(self):
+        """
+        Gets the actions of the reminders whose windows open soon, formatted
+        as if they were generated when the windows open.
+        """
+        if self._num_errors > 0 or self._reminder_index is None:
+            return []
+
+        now_num = TimeUtils.get_cur_time_num(self._clock.now())
+
+        actions = []
+        for window in self._reminder_index.find_windows_opening(
+                now_num, now_num + self.PRERENDER_AHEAD_MIN):
+            action = self._action_generator.generate_reminder_action(
+                window.schedule_item, window.target_train, window.reminder,
+                now_num=window.first_remind_time)
+            actions.append(action)
+        return actions
+
+    def get_reminder_plan(self):
+        """
+        Gets the reminder windows of the day sorted by their first remind
+        times.
+        """
+        if self._reminder_index is None:
+            return []
+        return self._reminder_index.get_windows()
+
+    def get_next_api_update_time(self):
+        return self._api_controller.get_next_update_time()
+
     def _init_stations_set(self):
         self._stations_set = None
 
     def _init_remind_state(self):
-        self._last_remind_time = {}
+        # Replay the reminders announced before restarting
+        self._remind_journal = RemindJournal(self._args)
+        self._last_remind_time = self._remind_journal.load(
+            self._clock.now().date())
+
+        self._reminder_engine = ReminderEngine.create_engine(self._args)
+        self._reminder_index = None
+        self._invalidate_reminder_index()
 
     def _init_log_state(self):
         self._last_targets = None
@@ -48,8 +132,20 @@ class MainController(Base):
         self._num_errors = 0
 
     def _reset_states_when_settings_changes(self):
-        if self._app_settings.has_settings_changed():
-            self._last_remind_time = {}
+        if not self._app_settings.has_settings_changed():
+            return
+
+        # Only forget the reminders which have been changed or removed, the
+        # keys of the unchanged reminders stay the same
+        remind_keys = set()
+        for schedule_item in self._app_settings.iterate_schedule_items():
+            for reminder in schedule_item.iterate_reminders():
+                remind_keys.add(self._get_remind_key(schedule_item, reminder))
+        for remind_key in list(self._last_remind_time.keys()):
+            if remind_key not in remind_keys:
+                del self._last_remind_time[remind_key]
+
+        self._invalidate_reminder_index()
 
     def _update_stations_set(self):
         if not self._app_settings.has_settings_changed():
@@ -60,10 +156,9 @@ class MainController(Base):
             orig_and_dest = schedule_item.get_orig_dest()
             new_stations_set.add(orig_and_dest)
 
+        # Only the new routes are fetched by the next update
         self._stations_set = new_stations_set
 
-        self._api_controller.update(self._stations_set, force=True)
-
     def _try_update_api(self):
         try:
             self._api_controller.update(self._stations_set)
@@ -79,105 +174,123 @@ class MainController(Base):
             self._num_errors = 0
             return True
 
-    def _generate_reminder_actions(self):
+    def generate_reminder_actions(self):
+        """
+        Generates the actions of the reminders due at the time of the current
+        tick, and marks them as reminded.
+        """
+        now = self._clock.now()
+        self._update_reminder_index()
+
+        (start, end) = self._reminder_index.find_candidate_range(
+            TimeUtils.get_cur_time_num(now))
+        due_windows = self._reminder_engine.find_due_windows(now, start, end)
+        self._reminder_engine.mark_reminded(due_windows, now)
+
         actions = []
+        for window in due_windows:
+            self._update_last_remind_time(window.remind_key)
+            action = self._action_generator.generate_reminder_action(
+                window.schedule_item, window.target_train, window.reminder)
+            actions.extend([action] * window.reminder.get_repeat())
+        return actions
+
+    def _invalidate_reminder_index(self):
+        # The date, the timetable version and the target trains which the
+        # index is built with
+        self._index_date = None
+        self._index_timetable_version = None
+        self._index_target_keys = None
+
+    def _update_reminder_index(self):
+        # The target trains only change with the settings, the date and the
+        # timetables
+        date = self._clock.now().date()
+        timetable_version = self._api_controller.get_timetable_version()
+        if (date == self._index_date
+                and timetable_version == self._index_timetable_version):
+            return
+
         targets = []
         for schedule_item in self._app_settings.iterate_schedule_items():
             if self._check_active_target(schedule_item):
-                target = self._find_train_to_remind(schedule_item)
-                targets.append(target)
-                reminders_actions = self._check_reminder_time(
-                    schedule_item, target)
-                actions.extend(reminders_actions)
+                target = self.find_train_to_remind(schedule_item)
+            else:
+                target = None
+            targets.append(target)
 
-        self._log_trains_to_remind(targets)
+        self._index_date = date
+        self._index_timetable_version = timetable_version
 
-        return actions
+        # Keep the index if the updated timetables have the same target
+        # trains
+        target_keys = [self._get_target_key(target) for target in targets]
+        if target_keys == self._index_target_keys:
+            return
+        self._index_target_keys = target_keys
+
+        self._build_reminder_index(targets)
+        self._log_trains_to_remind(
+            [target for target in targets if target is not None])
+
+    def _build_reminder_index(self, targets):
+        windows = []
+        schedule_items = self._app_settings.iterate_schedule_items()
+        for schedule_item, target in zip(schedule_items, targets):
+            if target is None:
+                continue
+
+            (target_train, target_time) = target
+            for reminder in schedule_item.iterate_reminders():
+                remind_key = self._get_remind_key(schedule_item, reminder)
+                (first_remind_time, last_remind_time) = \
+                    reminder.get_remind_time_range(target_time)
+                windows.append(ReminderWindow(
+                    schedule_item, target_train, reminder, remind_key,
+                    first_remind_time, last_remind_time))
+
+        self._logger.debug('Build reminder index with {} windows'.format(
+            len(windows)))
+        self._reminder_index = ReminderIndex(windows)
+        self._reminder_engine.build(
+            self._reminder_index.get_windows(), self._last_remind_time)
+
+    def _get_remind_key(self, schedule_item, reminder):
+        return (schedule_item.get_key(), reminder.get_key())
+
+    def _get_target_key(self, target):
+        if target is None:
+            return None
+        (target_train, target_time) = target
+        return (target_train.get_daily_train_no(), target_time)
 
     def _check_active_target(self, schedule_item):
         if schedule_item.is_enabled():
             active_weekday = schedule_item.get_active_weekday()
-            return TimeUtils.check_active_weekday(active_weekday)
+            return TimeUtils.check_active_weekday(
+                active_weekday, self._clock.now())
         else:
             return False
 
-    def _find_train_to_remind(self, schedule_item):
+    def find_train_to_remind(self, schedule_item):
+        """
+        Finds the latest train of the schedule item, returns a tuple of the
+        train and its occasion time, or None if there is no such train.
+        """
         orig_and_dest = schedule_item.get_orig_dest()
         remind_time = schedule_item.get_time()
         occasion_target = schedule_item.get_occasion_target()
 
-        # Sort the timetable based on where and when
-        trains = self._api_controller.get_timetable(orig_and_dest)
-        sorted_timetable = self._sort_timetable(trains, occasion_target)
-
-        # Extract the times
-        extracted_times = self._extract_times(
-            sorted_timetable, occasion_target)
-
         # Find the latest train to remind
-        remind_index = self._find_latest_train(remind_time, extracted_times)
-        if remind_index >= 0:
-            target_train = sorted_timetable[remind_index]
-            target_time = extracted_times[remind_index]
-            return (target_train, target_time)
-        else:
-            return None
-
-    def _check_reminder_time(self, schedule_item, target):
-        if target is None:
-            return None
-
-        (target_train, target_time) = target
-
-        # Check each reminder
-        reminders_actions = []
-        for reminder in schedule_item.iterate_reminders():
-            remind_key = (schedule_item.get_index(), reminder.get_index())
-            if ((not self._has_reminded(target_time, remind_key, reminder))
-                    and self._is_time_to_remind(target_time, reminder)):
-                self._update_last_remind_time(remind_key)
-                action = self._action_generator.generate_reminder_action(
-                    schedule_item, target_train, reminder)
-                reminder_actions = [action] * reminder.get_repeat()
-                reminders_actions.extend(reminder_actions)
-        return reminders_actions
-
-    def _find_latest_train(self, remind_time, extracted_times):
+        timetable_index = self._api_controller.get_timetable_index(
+            orig_and_dest)
         time_num = TimeUtils.time_to_num(remind_time)
-
-        # Search the latest train
-        return self._binary_search(extracted_times, time_num)
-
-    def _has_reminded(self, target_time, remind_key, reminder):
-        if self._app_settings.has_settings_changed():
-            return False
-
-        (first_remind_time, last_remind_time) = reminder.get_remind_time_range(
-            target_time)
-
-        last_date = self._last_remind_time.get(remind_key, None)
-        if last_date is None:
-            return False
-        else:
-            cur_date = TimeUtils.get_cur_date()
-            last_time = TimeUtils.hour_min_to_num(
-                last_date.hour, last_date.minute)
-            return (last_date.date() == cur_date.date()
-                    and first_remind_time <= last_time
-                    and last_time <= last_remind_time)
-
-    def _is_time_to_remind(self, target_time, reminder):
-        now_num = TimeUtils.get_cur_time_num()
-        (first_remind_time, last_remind_time) = reminder.get_remind_time_range(
-            target_time)
-        self._logger.debug(
-            'now_num={}, first_remind_time={}, last_remind_time={}'.format(
-                now_num, first_remind_time, last_remind_time))
-        return first_remind_time <= now_num and now_num <= last_remind_time
+        return timetable_index.find_latest_train(occasion_target, time_num)
 
     def _update_last_remind_time(self, remind_key):
-        cur_date = TimeUtils.get_cur_date()
-        self._last_remind_time[remind_key] = cur_date
+        now = self._clock.now()
+        self._last_remind_time[remind_key] = now
+        self._remind_journal.append(remind_key, now, self._last_remind_time)
 
     def _log_trains_to_remind(self, targets):
         if targets != self._last_targets:
@@ -200,22 +313,3 @@ class MainController(Base):
             return self._action_generator.generate_alert_action(alert_info)
         else:
             return None
-
-    def _sort_timetable(self, trains, occasion_target):
-        return sorted(trains, key=lambda t: t.get_occasion_num(occasion_target))
-
-    def _extract_times(self, trains, occasion_target):
-        return list(map(lambda t: t.get_occasion_num(occasion_target), trains))
-
-    def _binary_search(self, lst, elem):
-        """
-        Performs binary search.
-
-        References:
-        * https://www.geeksforgeeks.org/binary-search-bisect-in-python/
-        """
-        i = bisect.bisect_left(lst, elem)
-        if i:
-            return i - 1
-        else:
-            return -1
@@ -0,0 +1,77 @@
+from thsr_voice_reminder.time_utils import TimeUtils
+from thsr_voice_reminder.train import Train
+
+
+class NetworkTimetable:
+    def __init__(self, train_date_list):
+        self._build_index(train_date_list)
+
+    def get_trains(self, station_orig, station_dest):
+        """
+        Gets the trains which stop at the origin station and then the
+        destination station, like the daily OD timetable API.
+        """
+        id_orig = self._name_to_id.get(station_orig, station_orig)
+        id_dest = self._name_to_id.get(station_dest, station_dest)
+
+        trains = []
+        for orig_stop_time in self._stop_times_by_station.get(id_orig, []):
+            (daily_train_info, orig_seq, _) = orig_stop_time
+            train_stop_times = self._stop_times_by_train[
+                daily_train_info['TrainNo']]
+            dest_stop_time = train_stop_times.get(id_dest, None)
+            if dest_stop_time is None:
+                continue
+
+            (_, dest_seq, _) = dest_stop_time
+            if orig_seq < dest_seq:
+                trains.append(self._build_train(orig_stop_time,
+                                                dest_stop_time))
+
+        return trains
+
+    def _build_index(self, train_date_list):
+        self._name_to_id = {}
+        # Station ID -> list of stop times
+        self._stop_times_by_station = {}
+        # Train number -> station ID -> stop time
+        self._stop_times_by_train = {}
+
+        for train_date_obj in train_date_list:
+            daily_train_info = train_date_obj['DailyTrainInfo']
+            train_stop_times = {}
+            for stop_time_obj in train_date_obj['StopTimes']:
+                station_id = stop_time_obj['StationID']
+                station_name = stop_time_obj['StationName']
+                self._name_to_id[station_name['En']] = station_id
+                self._name_to_id[station_name['Zh_tw']] = station_id
+
+                stop_time = (daily_train_info,
+                             stop_time_obj['StopSequence'],
+                             self._parse_stop_time(stop_time_obj))
+                train_stop_times[station_id] = stop_time
+                self._stop_times_by_station.setdefault(
+                    station_id, []).append(stop_time)
+
+            self._stop_times_by_train[daily_train_info['TrainNo']] = \
+                train_stop_times
+
+    def _parse_stop_time(self, stop_time_obj):
+        # The terminal stations may only have one of the times
+        departure_time = stop_time_obj.get('DepartureTime', None)
+        arrival_time = stop_time_obj.get('ArrivalTime', departure_time)
+        if departure_time is None:
+            departure_time = arrival_time
+        return (stop_time_obj['StationName'],
+                TimeUtils.time_to_num(arrival_time),
+                TimeUtils.time_to_num(departure_time))
+
+    def _build_train(self, orig_stop_time, dest_stop_time):
+        (daily_train_info, _, orig_times) = orig_stop_time
+        (_, _, dest_times) = dest_stop_time
+        (orig_station_name, orig_arrival_time, orig_depart_time) = orig_times
+        (dest_station_name, dest_arrival_time, dest_depart_time) = dest_times
+        return Train.from_stop_times(
+            daily_train_info,
+            orig_station_name, orig_arrival_time, orig_depart_time,
+            dest_station_name, dest_arrival_time, dest_depart_time)
@@ -0,0 +1,137 @@
+import datetime
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+
+from thsr_voice_reminder.base import Base
+
+
+class RemindJournal(Base):
+    """
+    Keeps the last remind time of each remind key in an append-only file, so
+    the reminders are not announced again after restarting.
+    """
+    # Compact the journal after appending this many entries
+    MAX_NUM_APPENDED = 1000
+
+    TIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+    def __init__(self, args):
+        super().__init__(self, args)
+
+        self._init_path()
+        self._num_appended = 0
+
+    def load(self, today):
+        """
+        Replays the journal and returns the last remind time of each remind
+        key reminded today, then compacts the journal.
+        """
+        last_remind_time = {}
+        if self._path is None:
+            return last_remind_time
+
+        try:
+            with open(str(self._path), 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            lines = []
+        except OSError:
+            self._logger.exception('Unable to read journal {}'.format(
+                self._path))
+            lines = []
+
+        for line in lines:
+            entry = self._parse_entry(line)
+            # Skip the partial line written when crashing
+            if entry is None:
+                continue
+
+            (remind_key, remind_time) = entry
+            if remind_time.date() == today:
+                last_remind_time[remind_key] = remind_time
+
+        self._logger.debug('Replay {} entries of journal {}'.format(
+            len(lines), self._path))
+        self.compact(last_remind_time)
+        return last_remind_time
+
+    def append(self, remind_key, remind_time, last_remind_time):
+        if self._path is None:
+            return
+
+        line = self._format_entry(remind_key, remind_time)
+        try:
+            with open(str(self._path), 'a', encoding='utf-8') as f:
+                f.write(line)
+                # Make sure the entry survives a crash before announcing
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError:
+            self._logger.exception('Unable to append journal {}'.format(
+                self._path))
+            return
+
+        self._num_appended += 1
+        if self._num_appended >= self.MAX_NUM_APPENDED:
+            self.compact(last_remind_time)
+
+    def compact(self, last_remind_time):
+        """
+        Rewrites the journal with only the last remind time of each remind
+        key.
+        """
+        if self._path is None:
+            return
+
+        # Write to a temporary file first so the journal is never partial
+        f = tempfile.NamedTemporaryFile(
+            mode='w', encoding='utf-8', dir=str(self._path.parent),
+            suffix='.tmp', delete=False)
+        try:
+            with f:
+                for remind_key, remind_time in last_remind_time.items():
+                    f.write(self._format_entry(remind_key, remind_time))
+            os.replace(f.name, str(self._path))
+        except OSError:
+            self._logger.exception('Unable to compact journal {}'.format(
+                self._path))
+            try:
+                os.unlink(f.name)
+            except OSError:
+                pass
+            return
+
+        self._num_appended = 0
+
+    def _init_path(self):
+        journal_dir = self._args.remind_journal_dir
+        if not journal_dir:
+            self._path = None
+            return
+
+        # Keep a journal for each settings file
+        settings_path = pathlib.Path(self._args.settings).resolve()
+        digest = hashlib.sha256(
+            str(settings_path).encode('utf-8')).hexdigest()[:8]
+        name = '{}-{}.jsonl'.format(settings_path.stem, digest)
+
+        journal_dir_obj = pathlib.Path(journal_dir)
+        journal_dir_obj.mkdir(parents=True, exist_ok=True)
+        self._path = journal_dir_obj / name
+
+    def _format_entry(self, remind_key, remind_time):
+        entry = list(remind_key) + [remind_time.strftime(self.TIME_FORMAT)]
+        return json.dumps(entry) + '\n'
+
+    def _parse_entry(self, line):
+        try:
+            entry = json.loads(line)
+            remind_key = tuple(entry[:-1])
+            remind_time = datetime.datetime.strptime(
+                entry[-1], self.TIME_FORMAT)
+        except (ValueError, TypeError, IndexError):
+            return None
+        return (remind_key, remind_time)
@@ -0,0 +1,166 @@
+import importlib.util
+
+from thsr_voice_reminder.base import Base
+from thsr_voice_reminder.time_utils import TimeUtils
+
+
+class ReminderWindow:
+    __slots__ = (
+        'schedule_item',
+        'target_train',
+        'reminder',
+        'remind_key',
+        'first_remind_time',
+        'last_remind_time',
+    )
+
+    def __init__(self, schedule_item, target_train, reminder, remind_key,
+                 first_remind_time, last_remind_time):
+        self.schedule_item = schedule_item
+        self.target_train = target_train
+        self.reminder = reminder
+        self.remind_key = remind_key
+        self.first_remind_time = first_remind_time
+        self.last_remind_time = last_remind_time
+
+
+class ReminderEngine(Base):
+    """
+    Finds the reminder windows which are due now and haven't been reminded
+    in the windows.
+    """
+    NAME = None
+
+    def __init__(self, args):
+        super().__init__(self, args)
+
+        self._windows = []
+        self._last_remind_time = {}
+
+    @staticmethod
+    def create_engine(args):
+        name = args.reminder_engine
+        # Check if NumPy is installed without importing it yet
+        has_numpy = importlib.util.find_spec('numpy') is not None
+        if name == 'auto':
+            name = 'numpy' if has_numpy else 'python'
+
+        if name == 'numpy':
+            if not has_numpy:
+                raise ValueError('Reminder engine "numpy" needs NumPy')
+            return NumpyReminderEngine(args)
+        elif name == 'python':
+            return PythonReminderEngine(args)
+        else:
+            raise ValueError('Unknown reminder engine "{}"'.format(name))
+
+    def build(self, windows, last_remind_time):
+        """
+        Builds the engine from the reminder windows and the last remind time
+        of each remind key, which is only read.
+        """
+        self._windows = windows
+        self._last_remind_time = last_remind_time
+
+    def find_due_windows(self, now, start, end):
+        """
+        Finds the due windows in the range of the windows.
+        """
+        raise NotImplementedError()
+
+    def mark_reminded(self, windows, now):
+        pass
+
+
+class PythonReminderEngine(ReminderEngine):
+    NAME = 'python'
+
+    def find_due_windows(self, now, start, end):
+        now_num = TimeUtils.get_cur_time_num(now)
+        return [window for window in self._windows[start:end]
+                if (self._is_time_to_remind(window, now_num)
+                    and not self._has_reminded(window, now))]
+
+    def _is_time_to_remind(self, window, now_num):
+        return (window.first_remind_time <= now_num
+                and now_num <= window.last_remind_time)
+
+    def _has_reminded(self, window, now):
+        last_date = self._last_remind_time.get(window.remind_key, None)
+        if last_date is None:
+            return False
+        else:
+            last_time = TimeUtils.hour_min_to_num(
+                last_date.hour, last_date.minute)
+            return (last_date.date() == now.date()
+                    and window.first_remind_time <= last_time
+                    and last_time <= window.last_remind_time)
+
+
+class NumpyReminderEngine(ReminderEngine):
+    """
+    Evaluates the windows with a few array operations, so the cost of each
+    tick doesn't grow with the interpreter overhead of each window.
+    """
+    NAME = 'numpy'
+
+    # Day of the windows which have never been reminded
+    NEVER = -1
+
+    def __init__(self, args):
+        super().__init__(args)
+
+        # NumPy takes long to import, only the engine using it imports it
+        import numpy
+        self._numpy = numpy
+
+    def build(self, windows, last_remind_time):
+        super().build(windows, last_remind_time)
+        numpy = self._numpy
+
+        num_windows = len(windows)
+        self._first_remind_times = numpy.fromiter(
+            (window.first_remind_time for window in windows),
+            dtype=numpy.int32, count=num_windows)
+        self._last_remind_times = numpy.fromiter(
+            (window.last_remind_time for window in windows),
+            dtype=numpy.int32, count=num_windows)
+
+        # The day and the time of the last reminder of each window
+        self._last_days = numpy.full(
+            num_windows, self.NEVER, dtype=numpy.int64)
+        self._last_times = numpy.zeros(num_windows, dtype=numpy.int32)
+        for i, window in enumerate(windows):
+            last_date = last_remind_time.get(window.remind_key, None)
+            if last_date is not None:
+                self._set_last_remind_time(i, last_date)
+
+        # Window index of each remind key, the keys may be shared
+        self._key_indexes = {}
+        for i, window in enumerate(windows):
+            self._key_indexes.setdefault(window.remind_key, []).append(i)
+
+    def find_due_windows(self, now, start, end):
+        numpy = self._numpy
+        now_num = TimeUtils.get_cur_time_num(now)
+        first = self._first_remind_times[start:end]
+        last = self._last_remind_times[start:end]
+        last_days = self._last_days[start:end]
+        last_times = self._last_times[start:end]
+
+        is_open = (first <= now_num) & (now_num <= last)
+        has_reminded = ((last_days == now.toordinal())
+                        & (first <= last_times)
+                        & (last_times <= last))
+        due_indexes = numpy.flatnonzero(is_open & ~has_reminded)
+        return [self._windows[start + i] for i in due_indexes]
+
+    def mark_reminded(self, windows, now):
+        for window in windows:
+            for i in self._key_indexes[window.remind_key]:
+                self._set_last_remind_time(i, now)
+
+    def _set_last_remind_time(self, i, last_date):
+        self._last_days[i] = last_date.toordinal()
+        self._last_times[i] = TimeUtils.hour_min_to_num(
+            last_date.hour, last_date.minute)
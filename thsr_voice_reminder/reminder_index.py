@@ -0,0 +1,64 @@
+import bisect
+
+
+class ReminderIndex:
+    """
+    Indexes the reminder windows of the day by their first remind times, so
+    the windows open at a time and the next window can be found with binary
+    searches.
+    """
+
+    def __init__(self, windows):
+        self._windows = sorted(
+            windows, key=lambda window: window.first_remind_time)
+
+        self._build_index()
+
+    def get_windows(self):
+        """
+        Gets all the windows of the day sorted by their first remind times.
+        """
+        return self._windows
+
+    def find_candidate_range(self, time_num):
+        """
+        Gets the range (start, end) of the windows which may be open at the
+        time, the windows outside the range are either closed or not opened
+        yet.
+        """
+        start = bisect.bisect_left(
+            self._first_remind_times, time_num - self._max_window_length)
+        end = bisect.bisect_right(self._first_remind_times, time_num)
+        return (start, end)
+
+    def find_open_windows(self, time_num):
+        (start, end) = self.find_candidate_range(time_num)
+        return [window for window in self._windows[start:end]
+                if time_num <= window.last_remind_time]
+
+    def find_next_window_time(self, time_num):
+        """
+        Gets the first remind time of the next window opening after the time,
+        or None if there is no more window today.
+        """
+        i = bisect.bisect_right(self._first_remind_times, time_num)
+        if i < len(self._first_remind_times):
+            return self._first_remind_times[i]
+        else:
+            return None
+
+    def find_windows_opening(self, after_time_num, until_time_num):
+        """
+        Gets the windows opening after the first time until the second time.
+        """
+        start = bisect.bisect_right(self._first_remind_times, after_time_num)
+        end = bisect.bisect_right(self._first_remind_times, until_time_num)
+        return self._windows[start:end]
+
+    def _build_index(self):
+        self._first_remind_times = [window.first_remind_time
+                                    for window in self._windows]
+        # Bound how far back the open windows can start
+        self._max_window_length = max(
+            (window.last_remind_time - window.first_remind_time
+             for window in self._windows), default=0)
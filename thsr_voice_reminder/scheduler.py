@@ -0,0 +1,99 @@
+import heapq
+import threading
+import time
+
+from thsr_voice_reminder.base import Base
+
+
+class Scheduler(Base):
+    def __init__(self, args):
+        super().__init__(self, args)
+
+        self._init_timers()
+        self._init_wake_state()
+
+    def set_timer(self, name, when):
+        """
+        Sets the timer with the name to fire at the timestamp, replacing the
+        previous timer with the same name.
+        """
+        if when is None:
+            self.cancel_timer(name)
+            return
+
+        with self._lock:
+            self._timers[name] = when
+            heapq.heappush(self._heap, (when, name))
+
+    def cancel_timer(self, name):
+        with self._lock:
+            self._timers.pop(name, None)
+
+    def wake(self, reason):
+        """
+        Wakes up the waiting thread early. Can be called from any thread.
+        """
+        with self._lock:
+            self._wake_reasons.add(reason)
+        self._wake_event.set()
+
+    def wait(self):
+        """
+        Blocks until the earliest timer fires or someone calls wake().
+
+        Returns the names of the fired timers and the wake reasons.
+        """
+        while True:
+            with self._lock:
+                wake_reasons = self._pop_wake_reasons()
+                if wake_reasons:
+                    return wake_reasons
+
+                now = time.time()
+                fired = self._pop_fired_timers(now)
+                if fired:
+                    return fired
+
+                next_time = self._peek_next_time()
+
+            if next_time is None:
+                timeout = None
+            else:
+                timeout = max(0, next_time - now)
+            self._logger.debug('Sleep for {} seconds'.format(timeout))
+
+            self._wake_event.wait(timeout)
+
+    def _init_timers(self):
+        self._lock = threading.Lock()
+        # Timer name -> timestamp, the heap may contain outdated entries
+        self._timers = {}
+        self._heap = []
+
+    def _init_wake_state(self):
+        self._wake_event = threading.Event()
+        self._wake_reasons = set()
+
+    def _pop_wake_reasons(self):
+        self._wake_event.clear()
+        wake_reasons = sorted(self._wake_reasons)
+        self._wake_reasons = set()
+        return wake_reasons
+
+    def _pop_fired_timers(self, now):
+        fired = []
+        while self._heap and self._heap[0][0] <= now:
+            (when, name) = heapq.heappop(self._heap)
+            if self._timers.get(name, None) == when:
+                del self._timers[name]
+                fired.append(name)
+        return fired
+
+    def _peek_next_time(self):
+        # Drop the outdated entries
+        while self._heap:
+            (when, name) = self._heap[0]
+            if self._timers.get(name, None) == when:
+                return when
+            heapq.heappop(self._heap)
+        return None
@@ -0,0 +1,159 @@
+import datetime
+import logging
+import os
+
+from thsr_voice_reminder.action_generator import ActionGenerator
+from thsr_voice_reminder.api_controller import ApiController
+from thsr_voice_reminder.app_settings import AppSettings
+from thsr_voice_reminder.base import Base
+from thsr_voice_reminder.clock import SimulatedClock
+from thsr_voice_reminder.time_utils import TimeUtils
+from thsr_voice_reminder.timetable_index import TimetableIndex
+
+
+class SettingsChecker(Base):
+    """
+    Validates the settings and resolves the target trains from the cached
+    timetables, without initializing the audio or the TTS.
+    """
+
+    def __init__(self, args):
+        super().__init__(self, args)
+
+        self._init_clock()
+
+        self._app_settings = AppSettings(self._args)
+        # Only read the cached timetables, never call the API
+        self._api_controller = ApiController(
+            self._args, clock=self._clock, offline=True)
+        self._action_generator = ActionGenerator(
+            self._args, self._app_settings, clock=self._clock)
+
+    def check(self):
+        """
+        Prints the target train of each schedule item and the problems
+        found. Returns True if there is no problem.
+        """
+        if not self._args.verbose:
+            logging.disable(logging.INFO)
+        try:
+            problems = self._check_settings()
+        finally:
+            logging.disable(logging.NOTSET)
+
+        for problem in problems:
+            print('Problem: {}'.format(problem))
+        print('{} problem(s) in {} on {}'.format(
+            len(problems), self._args.settings,
+            self._date.strftime('%Y-%m-%d %a')))
+
+        return len(problems) == 0
+
+    def _init_clock(self):
+        if self._args.simulate_date is None:
+            self._date = datetime.date.today()
+        else:
+            self._date = datetime.datetime.strptime(
+                self._args.simulate_date, '%Y-%m-%d').date()
+
+        self._clock = SimulatedClock(
+            datetime.datetime.combine(self._date, datetime.time()))
+
+    def _check_settings(self):
+        try:
+            self._app_settings.load()
+            schedule_items = list(self._app_settings.iterate_schedule_items())
+        except Exception as e:
+            return ['Unable to load the settings: {}'.format(e)]
+
+        problems = []
+        for schedule_item in schedule_items:
+            problems.extend(self._check_schedule_item(schedule_item))
+
+        for path in sorted(self._app_settings.get_sound_paths()):
+            if not os.path.isfile(path):
+                problems.append('Sound {} does not exist'.format(path))
+
+        return problems
+
+    def _check_schedule_item(self, schedule_item):
+        name = 'Schedule item {}'.format(schedule_item.get_index() + 1)
+        try:
+            label = schedule_item.get_label()
+            orig_and_dest = schedule_item.get_orig_dest()
+            time_num = TimeUtils.time_to_num(schedule_item.get_time())
+            occasion_target = schedule_item.get_occasion_target()
+            is_enabled = schedule_item.is_enabled()
+            is_active = TimeUtils.check_active_weekday(
+                schedule_item.get_active_weekday(), self._date)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            return ['{}: invalid or missing field {}'.format(name, e)]
+
+        if occasion_target not in TimetableIndex.OCCASION_TARGETS:
+            return ['{}: unknown target {}'.format(name, occasion_target)]
+
+        problems = self._check_reminders(name, schedule_item, time_num)
+
+        try:
+            timetable_index = self._read_timetable_index(orig_and_dest)
+        except ValueError:
+            problems.append('{}: no cached timetable of {}-{}, check the'
+                            ' station names or run once online'.format(
+                                name, *orig_and_dest))
+            return problems
+
+        target = timetable_index.find_latest_train(occasion_target, time_num)
+        if target is None:
+            problems.append('{}: no train {} {} before {}'.format(
+                name, *occasion_target, TimeUtils.num_to_time(time_num)))
+            return problems
+
+        (target_train, target_time) = target
+        status = ''
+        if not is_enabled:
+            status = ' (disabled)'
+        elif not is_active:
+            status = ' (inactive on {})'.format(self._date.strftime('%a'))
+        print('{}-{} {} {}: train {} {} {} at {}{}'.format(
+            *orig_and_dest, TimeUtils.num_to_time(time_num), label,
+            target_train.get_daily_train_no(), *occasion_target,
+            TimeUtils.num_to_time(target_time), status))
+
+        # Format the voice messages with the target train
+        for reminder in schedule_item.iterate_reminders():
+            try:
+                self._action_generator.generate_reminder_action(
+                    schedule_item, target_train, reminder)
+            except (AttributeError, IndexError, KeyError, ValueError) as e:
+                problems.append(
+                    '{}, reminder {}: invalid voice message {!r}'.format(
+                        name, reminder.get_index() + 1, e))
+
+        return problems
+
+    def _check_reminders(self, name, schedule_item, time_num):
+        problems = []
+        for reminder in schedule_item.iterate_reminders():
+            reminder_name = '{}, reminder {}'.format(
+                name, reminder.get_index() + 1)
+            try:
+                (first_remind_time, last_remind_time) = \
+                    reminder.get_remind_time_range(time_num)
+                repeat = reminder.get_repeat()
+            except (AttributeError, KeyError, TypeError) as e:
+                problems.append('{}: invalid or missing field {}'.format(
+                    reminder_name, e))
+                continue
+
+            if first_remind_time > last_remind_time:
+                problems.append('{}: last_before_min is larger than'
+                                ' before_min'.format(reminder_name))
+            if type(repeat) is not int or repeat < 1:
+                problems.append('{}: repeat should be a positive'
+                                ' integer'.format(reminder_name))
+        return problems
+
+    def _read_timetable_index(self, orig_and_dest):
+        # Only the new route is read from the cache
+        self._api_controller.update({orig_and_dest})
+        return self._api_controller.get_timetable_index(orig_and_dest)
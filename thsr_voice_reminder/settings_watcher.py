@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import importlib.util
+import time
+
+from thsr_voice_reminder.app_settings import AppSettings
+from thsr_voice_reminder.base import Base
+
+
+class SettingsWatcher(Base):
+    # 1 second
+    WATCH_INTERVAL = 1
+
+    def __init__(self, args, on_change):
+        super().__init__(self, args)
+
+        self._on_change = on_change
+
+        self._init_watch_state()
+
+    def start(self):
+        self._last_stat = AppSettings.stat_settings_file(self._args.settings)
+
+        if importlib.util.find_spec('watchdog') is not None:
+            self._start_observer()
+        else:
+            self._logger.debug('watchdog is not available, poll the stat')
+            self._executor.submit(self._watch)
+
+    def _init_watch_state(self):
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._lock = threading.Lock()
+        self._last_stat = None
+
+    def _start_observer(self):
+        from watchdog.observers import Observer
+
+        # Watch the parent directory since editors may replace the file
+        path = os.path.abspath(self._args.settings)
+        handler = _SettingsEventHandler(path, self._check_settings)
+
+        self._observer = Observer()
+        self._observer.schedule(handler, os.path.dirname(path))
+        self._observer.daemon = True
+        self._observer.start()
+
+    def _watch(self):
+        while True:
+            try:
+                time.sleep(self.WATCH_INTERVAL)
+
+                self._check_settings()
+            except:
+                self._logger.exception('Unable to watch the settings file')
+
+    def _check_settings(self):
+        with self._lock:
+            cur_stat = AppSettings.stat_settings_file(self._args.settings)
+            if cur_stat == self._last_stat:
+                return
+            self._last_stat = cur_stat
+
+        self._logger.debug('The settings file has been modified')
+        self._on_change()
+
+
+class _SettingsEventHandler:
+    def __init__(self, path, on_event):
+        self._path = path
+        self._on_event = on_event
+
+    def dispatch(self, event):
+        paths = [getattr(event, 'src_path', None),
+                 getattr(event, 'dest_path', None)]
+        if self._path in paths:
+            self._on_event()
@@ -0,0 +1,96 @@
+import threading
+
+from thsr_voice_reminder.api_controller import ApiController
+from thsr_voice_reminder.base import Base
+
+
+class SharedApiController(Base):
+    def __init__(self, args):
+        super().__init__(self, args)
+
+        self._api_controller = ApiController(self._args)
+
+        self._init_tenant_state()
+
+    def get_tenant_api_controller(self, tenant_name):
+        """
+        Gets the API controller which can be used by the main controller of
+        the tenant, the API data is shared by all the tenants.
+        """
+        return TenantApiController(self, tenant_name)
+
+    def update(self, tenant_name, stations_set, force=False):
+        with self._lock:
+            if stations_set != self._stations_sets.get(tenant_name, None):
+                self._stations_sets[tenant_name] = stations_set
+                self._update_union_stations_set()
+
+            # The new routes of any tenant are fetched without forcing
+            self._api_controller.update(
+                self._union_stations_set, force=force)
+
+            if self._api_controller.check_new_alert_info():
+                self._alert_info_version += 1
+
+    def remove_tenant(self, tenant_name):
+        with self._lock:
+            self._stations_sets.pop(tenant_name, None)
+            self._update_union_stations_set()
+
+    def get_alert_info_version(self):
+        return self._alert_info_version
+
+    def get_api_controller(self):
+        return self._api_controller
+
+    def _init_tenant_state(self):
+        self._lock = threading.RLock()
+        # Tenant name -> set of (orig, dest)
+        self._stations_sets = {}
+        self._union_stations_set = set()
+        self._alert_info_version = 0
+
+    def _update_union_stations_set(self):
+        union_stations_set = set()
+        for stations_set in self._stations_sets.values():
+            union_stations_set |= stations_set
+
+        self._union_stations_set = union_stations_set
+
+
+class TenantApiController:
+    def __init__(self, shared_api_controller, tenant_name):
+        self._shared_api_controller = shared_api_controller
+        self._api_controller = shared_api_controller.get_api_controller()
+        self._tenant_name = tenant_name
+
+        self._last_alert_info_version = \
+            shared_api_controller.get_alert_info_version()
+
+    def update(self, stations_set, force=False):
+        self._shared_api_controller.update(
+            self._tenant_name, stations_set, force=force)
+
+    def get_next_update_time(self):
+        return self._api_controller.get_next_update_time()
+
+    def get_timetable(self, orig_and_dest):
+        return self._api_controller.get_timetable(orig_and_dest)
+
+    def get_timetable_index(self, orig_and_dest):
+        return self._api_controller.get_timetable_index(orig_and_dest)
+
+    def get_timetable_version(self):
+        return self._api_controller.get_timetable_version()
+
+    def get_alert_info(self):
+        return self._api_controller.get_alert_info()
+
+    def check_new_alert_info(self):
+        # Each tenant announces each new alert info once
+        alert_info_version = \
+            self._shared_api_controller.get_alert_info_version()
+        has_new_alert_info = (alert_info_version
+                              != self._last_alert_info_version)
+        self._last_alert_info_version = alert_info_version
+        return has_new_alert_info
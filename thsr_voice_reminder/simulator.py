@@ -0,0 +1,124 @@
+import copy
+import datetime
+import logging
+import time
+
+from thsr_voice_reminder.api_controller import ApiController
+from thsr_voice_reminder.app_settings import AppSettings
+from thsr_voice_reminder.base import Base
+from thsr_voice_reminder.clock import SimulatedClock
+from thsr_voice_reminder.main_controller import MainController
+from thsr_voice_reminder.time_utils import TimeUtils
+
+
+class Simulator(Base):
+    NUM_DAYS = {
+        'day': 1,
+        'week': 7,
+    }
+
+    def __init__(self, args):
+        # Never touch the journal of the real reminders
+        args = copy.copy(args)
+        args.remind_journal_dir = None
+
+        super().__init__(self, args)
+
+        self._init_clock()
+
+        self._app_settings = AppSettings(self._args)
+        # Only replay the cached timetables, never call the API
+        self._api_controller = ApiController(
+            self._args, clock=self._clock, offline=True)
+        self._main_controller = MainController(
+            self._args, self._app_settings,
+            api_controller=self._api_controller, clock=self._clock)
+
+    def run(self):
+        """
+        Replays the ticks of the simulated days and prints the announcements
+        which would be made.
+        """
+        # Silence the per-tick logs, the announcements are the output
+        if not self._args.verbose:
+            logging.disable(logging.INFO)
+
+        start_time = time.perf_counter()
+        try:
+            announcements = self._simulate()
+        finally:
+            logging.disable(logging.NOTSET)
+        elapsed_time = time.perf_counter() - start_time
+
+        for (simulated_time, action) in announcements:
+            message = ' '.join(action['voice']['message'].split())
+            print('{} {}'.format(
+                simulated_time.strftime('%Y-%m-%d %a %H:%M'), message))
+        print('{} announcements in {} day(s), simulated in {:.3f}s'.format(
+            len(announcements), self._num_days, elapsed_time))
+
+        return announcements
+
+    def show_plan(self):
+        """
+        Prints the reminder windows of the first simulated day.
+        """
+        if not self._args.verbose:
+            logging.disable(logging.INFO)
+        try:
+            self._clock.set_time(self._start_time)
+            self._app_settings.load()
+            self._main_controller.run_and_get_actions()
+            windows = self._main_controller.get_reminder_plan()
+        finally:
+            logging.disable(logging.NOTSET)
+
+        for window in windows:
+            print('{}-{} {} (train {}, repeat {}): {}'.format(
+                TimeUtils.num_to_time(window.first_remind_time),
+                TimeUtils.num_to_time(window.last_remind_time),
+                window.schedule_item.get_label(),
+                window.target_train.get_daily_train_no(),
+                window.reminder.get_repeat(),
+                ' '.join(window.reminder.get_voice_message().split())))
+        print('{} reminder windows on {}'.format(
+            len(windows), self._start_time.strftime('%Y-%m-%d %a')))
+
+        return windows
+
+    def _init_clock(self):
+        if self._args.simulate_date is None:
+            date = datetime.date.today()
+        else:
+            date = datetime.datetime.strptime(
+                self._args.simulate_date, '%Y-%m-%d').date()
+
+        # The plan is only shown for the first day
+        self._num_days = self.NUM_DAYS.get(self._args.simulate, 1)
+        self._start_time = datetime.datetime.combine(date, datetime.time())
+        self._end_time = self._start_time + datetime.timedelta(
+            days=self._num_days)
+        self._clock = SimulatedClock(self._start_time)
+
+    def _simulate(self):
+        announcements = []
+        simulated_time = self._start_time
+        while simulated_time < self._end_time:
+            self._clock.set_time(simulated_time)
+
+            self._app_settings.load()
+            actions = self._main_controller.run_and_get_actions()
+            for action in actions:
+                announcements.append((simulated_time, action))
+
+            simulated_time = self._get_next_tick_time(simulated_time)
+        return announcements
+
+    def _get_next_tick_time(self, simulated_time):
+        # Skip the ticks which can't make any announcement
+        next_remind_time = self._main_controller.get_next_remind_time()
+        if next_remind_time is not None:
+            return datetime.datetime.fromtimestamp(next_remind_time)
+
+        next_day = simulated_time.date() + datetime.timedelta(days=1)
+        return datetime.datetime.combine(next_day, datetime.time())
@@ -1,59 +1,164 @@
 from concurrent.futures import ThreadPoolExecutor
 from queue import Queue
 import os
+import threading
 import time
 
-import vlc
-
 from thsr_voice_reminder.base import Base
+from thsr_voice_reminder.sound_bank import SoundBank
 
 
 class Sound(Base):
+    # 1 second
+    CHECK_STATE_INTERVAL = 1
+    # 10 seconds
+    START_TIMEOUT = 10
+
+    ERROR_SOUND_PATHS = [
+        'sound/Error Signal 2.mp3',
+        'voices/error_occurred.mp3',
+    ]
+
     def __init__(self, args):
         super().__init__(self, args)
 
+        self._init_player()
         self._init_process_state()
 
     def notify_error(self):
-        self.play_sound('sound/Error Signal 2.mp3')
-        self.play_sound('voices/error_occurred.mp3')
+        for path in self.ERROR_SOUND_PATHS:
+            self.play_sound(path)
+
+    def preload_sounds(self, paths):
+        """
+        Keeps the parsed media of the sounds and the error sounds to be
+        reused by every play.
+        """
+        self._sound_bank.preload(set(paths) | set(self.ERROR_SOUND_PATHS))
 
     def play_sound(self, path):
-        if path is None:
+        if path is None or self._is_closed:
             return
 
-        self._path_queue.put((path, False))
+        self._path_queue.put((path, False, time.time()))
 
     def play_sound_and_delete(self, path):
-        self._path_queue.put((path, True))
+        if self._is_closed:
+            self._delete_clip(path)
+            return
+
+        self._path_queue.put((path, True, time.time()))
+
+    def wait_until_played(self):
+        """
+        Blocks until all the queued clips have been played.
+        """
+        self._path_queue.join()
+
+    def close(self):
+        """
+        Drops the queued clips, stops the player thread and releases the
+        player.
+        """
+        self._is_closed = True
+        # Wake up the player thread to stop it
+        self._path_queue.put((None, False, time.time()))
+        # Stop the clip being played without waiting for its events
+        self._player.stop()
+        self._playing_event.set()
+        self._ended_event.set()
+        self._executor.shutdown(wait=True)
+
+        self._sound_bank.preload([])
+        self._player.release()
+        self._vlc_instance.release()
+
+    def _init_player(self):
+        # Import VLC only when playing, so the other modes start fast
+        import vlc
+        self._vlc = vlc
+
+        # Reuse one instance and player for all the clips
+        self._vlc_instance = self._vlc.Instance()
+        self._player = self._vlc_instance.media_player_new()
+        self._sound_bank = SoundBank(self._args, self._vlc_instance)
+
+        self._playing_event = threading.Event()
+        self._ended_event = threading.Event()
+
+        event_manager = self._player.event_manager()
+        event_manager.event_attach(
+            self._vlc.EventType.MediaPlayerPlaying, self._on_playing)
+        event_manager.event_attach(
+            self._vlc.EventType.MediaPlayerEndReached, self._on_ended)
+        event_manager.event_attach(
+            self._vlc.EventType.MediaPlayerEncounteredError, self._on_ended)
 
     def _init_process_state(self):
-        self._executor = ThreadPoolExecutor()
-        self._executor.submit(self._play)
+        self._is_closed = False
         self._path_queue = Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._executor.submit(self._play)
 
     def _play(self):
         while True:
+            # Block until there is a clip to play
+            (path, delete, queued_time) = self._path_queue.get()
             try:
-                if not self._path_queue.empty():
-                    (path, delete) = self._path_queue.get()
-
-                    vlc_instance = vlc.Instance()
-
-                    media = vlc_instance.media_new(path)
-                    player = vlc_instance.media_player_new()
-
-                    player.set_media(media)
-                    player.play()
+                if path is None:
+                    return
+                # Skip the clips queued before closing
+                if not self._is_closed:
+                    self._play_clip(path, queued_time)
+            except:
+                self._logger.exception('Unable to play {}'.format(path))
+            finally:
+                if delete:
+                    self._delete_clip(path)
+                self._path_queue.task_done()
+
+    def _delete_clip(self, path):
+        # Keep the player thread alive if the file can't be deleted
+        try:
+            os.unlink(path)
+        except OSError:
+            self._logger.exception('Unable to delete {}'.format(path))
+
+    def _play_clip(self, path, queued_time):
+        # Play the preloaded sound if possible
+        media = self._sound_bank.get_media(path)
+        if media is None:
+            media = self._vlc_instance.media_new(path)
+
+        self._playing_event.clear()
+        self._ended_event.clear()
+
+        dequeued_time = time.time()
+        self._player.set_media(media)
+        self._player.play()
+
+        # Report how long it takes before the clip starts playing
+        if self._playing_event.wait(self.START_TIMEOUT):
+            started_time = time.time()
+            self._logger.info(
+                'Start playing {} in {:.3f}s ({:.3f}s in queue)'.format(
+                    path, started_time - dequeued_time,
+                    dequeued_time - queued_time))
+        else:
+            self._logger.warning('Unable to start playing {}'.format(path))
+            self._player.stop()
+            return
 
-                    # Wait until the player state changes to ended
-                    while player.get_state() != vlc.State.Ended:
-                        time.sleep(0.1)
+        # Wait until the clip ends, and check the state in case the event
+        # is missed
+        while not self._ended_event.wait(self.CHECK_STATE_INTERVAL):
+            state = self._player.get_state()
+            if state in (self._vlc.State.Ended, self._vlc.State.Error,
+                         self._vlc.State.Stopped):
+                break
 
-                    if delete:
-                        os.unlink(path)
+    def _on_playing(self, event):
+        self._playing_event.set()
 
-                # Sleep for an extra 1 second
-                time.sleep(1)
-            except:
-                pass
+    def _on_ended(self, event):
+        self._ended_event.set()
@@ -0,0 +1,58 @@
+import os
+import threading
+
+from thsr_voice_reminder.base import Base
+
+
+class SoundBank(Base):
+    def __init__(self, args, vlc_instance):
+        super().__init__(self, args)
+
+        self._vlc_instance = vlc_instance
+
+        self._init_bank()
+
+    def preload(self, paths):
+        """
+        Creates and parses the media of the sounds once, and keeps them to be
+        reused by every play. The media which are not in the paths anymore
+        are released.
+        """
+        with self._lock:
+            old_medias = self._medias
+
+        medias = {}
+        for path in paths:
+            media = old_medias.get(path, None)
+            if media is None:
+                media = self._load_media(path)
+            if media is not None:
+                medias[path] = media
+
+        with self._lock:
+            self._medias = medias
+
+        for path, media in old_medias.items():
+            if path not in medias:
+                media.release()
+
+    def get_media(self, path):
+        with self._lock:
+            return self._medias.get(path, None)
+
+    def _init_bank(self):
+        self._lock = threading.Lock()
+        # Path -> parsed media
+        self._medias = {}
+
+    def _load_media(self, path):
+        self._logger.debug('Preload sound {}'.format(path))
+        if not os.path.isfile(path):
+            self._logger.warning('Unable to preload sound {}'.format(path))
+            return None
+
+        # Only the parsing is cached, libvlc still reads and decodes the file
+        # whenever the media is played
+        media = self._vlc_instance.media_new(path)
+        media.parse()
+        return media
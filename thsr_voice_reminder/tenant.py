@@ -0,0 +1,61 @@
+from thsr_voice_reminder.announcer import Announcer
+from thsr_voice_reminder.app_settings import AppSettings
+from thsr_voice_reminder.base import Base
+from thsr_voice_reminder.clock import Clock
+from thsr_voice_reminder.main_controller import MainController
+from thsr_voice_reminder.sound import Sound
+from thsr_voice_reminder.voice import Voice
+
+
+class ReminderTenant(Base):
+    def __init__(self, args, api_controller=None, clock=None):
+        super().__init__(self, args)
+
+        # Share the clock, so the expire times of the actions are checked
+        # with the same time as they are generated
+        if clock is None:
+            clock = Clock()
+        self._clock = clock
+
+        self._app_settings = AppSettings(self._args)
+
+        self._main_controller = MainController(
+            self._args, self._app_settings, api_controller=api_controller,
+            clock=self._clock)
+        self._sound = Sound(self._args)
+        self._voice = Voice(self._args, self._sound)
+        self._announcer = Announcer(
+            self._args, self._voice, self._sound, clock=self._clock)
+
+    def close(self):
+        """
+        Stops the announcing, prerendering and playing threads, and releases
+        the sound player.
+        """
+        self._announcer.close()
+        self._voice.close()
+        self._sound.close()
+
+    def get_main_controller(self):
+        return self._main_controller
+
+    def check_time_and_make_sound(self):
+        try:
+            self._app_settings.load()
+            if self._app_settings.has_settings_changed():
+                self._sound.preload_sounds(
+                    self._app_settings.get_sound_paths())
+
+            actions = self._main_controller.run_and_get_actions()
+
+            # Only queue the actions, the speech is synthesized and played
+            # by the other threads
+            self._announcer.enqueue(actions)
+
+            # Synthesize the upcoming reminders before their windows open
+            upcoming_actions = self._main_controller.get_upcoming_actions()
+            self._voice.prerender(upcoming_actions)
+        except:
+            self._logger.exception('Unable to check time and make sound')
+            self._sound.notify_error()
+            raise
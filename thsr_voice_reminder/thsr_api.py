@@ -1,6 +1,6 @@
 import json
-import requests
 
+from thsr_voice_reminder.api_recording import ApiRecording
 from thsr_voice_reminder.base import Base
 from thsr_voice_reminder.train import Train
 
@@ -10,17 +10,44 @@ class ThsrApi(Base):
         super().__init__(self, args)
 
         self._has_init = False
+        self.name_to_id = None
 
     def init_api(self):
         if not self._has_init:
             self._logger.debug('Initialize API')
 
             self._init_auth()
-            self._read_station()
+            self._init_session()
 
             self._has_init = True
 
-    def read_timetable(self, station_orig, station_dest, date):
+    def has_stations(self):
+        return self.name_to_id is not None
+
+    def read_station_list(self):
+        self._logger.debug('Read station')
+
+        params = {'format': 'JSON'}
+        station_list = self._get_data('/Station', params=params)
+        self._logger.debug('station_list={}'.format(station_list))
+
+        return station_list
+
+    def set_stations(self, station_list):
+        # Build the mapping from name to ID
+        name_to_id = {}
+        for station in station_list:
+            station_id = station['StationID']
+            station_name = station['StationName']
+            name_en = station_name['En']
+            name_tw = station_name['Zh_tw']
+
+            name_to_id[name_en] = station_id
+            name_to_id[name_tw] = station_id
+
+        self.name_to_id = name_to_id
+
+    def read_timetable_list(self, station_orig, station_dest, date):
         self._logger.debug('Read timetable, orig={}, dest={}, date={}'.format(
             station_orig, station_dest, date))
 
@@ -31,29 +58,48 @@ class ThsrApi(Base):
         # Convert date to string (YYYY-MM-DD)
         date_str = date.strftime('%Y-%m-%d')
 
-        url = ('https://ptx.transportdata.tw'
-               '/MOTC/v2/Rail/THSR/DailyTimetable/OD/{}/to/{}/{}').format(
+        path = '/DailyTimetable/OD/{}/to/{}/{}'.format(
             id_orig, id_dest, date_str)
         params = {'format': 'JSON'}
-        timetable_list = self._get_data(url, params=params)
+        timetable_list = self._get_data(path, params=params)
         self._logger.debug('timetable_list={}'.format(timetable_list))
 
+        return timetable_list
+
+    def read_train_date_list(self, date):
+        self._logger.debug('Read train date timetable, date={}'.format(date))
+
+        # Convert date to string (YYYY-MM-DD)
+        date_str = date.strftime('%Y-%m-%d')
+
+        path = '/DailyTimetable/TrainDate/{}'.format(date_str)
+        params = {'format': 'JSON'}
+        train_date_list = self._get_data(path, params=params)
+        self._logger.debug('train_date_list={}'.format(train_date_list))
+
+        return train_date_list
+
+    @staticmethod
+    def parse_timetable(timetable_list):
         trains = []
         for timetable_obj in timetable_list:
-            train = Train(timetable_obj)
+            train = Train.from_api_obj(timetable_obj)
             trains.append(train)
 
         return trains
 
-    def read_alert_info(self):
+    def read_alert_list(self):
         self._logger.debug('Read alert info')
 
         params = {'format': 'JSON'}
         alert_list = self._get_data(
-            'https://ptx.transportdata.tw/MOTC/v2/Rail/THSR/AlertInfo',
-            params=params)
+            '/AlertInfo', params=params, conditional=True)
         self._logger.debug('alert_list={}'.format(alert_list))
 
+        return alert_list
+
+    @staticmethod
+    def parse_alert_info(alert_list):
         # Check the alert info
         alert_info = []
         for alert in alert_list:
@@ -77,32 +123,78 @@ class ThsrApi(Base):
                            ' AppleWebKit/537.36 (KHTML, like Gecko)'
                            ' Chrome/74.0.3729.169 Safari/537.36')}
 
-    def _read_station(self):
-        self._logger.debug('Read station')
+    def _build_conditional_headers(self, last_response):
+        (etag, last_modified, _) = last_response
+        headers = {}
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        if last_modified is not None:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def _init_session(self):
+        # Import requests only when calling the API, so the offline modes
+        # start fast
+        import requests
+        from requests.adapters import HTTPAdapter
+        self._requests = requests
+
+        # Keep the connections alive to skip the TLS handshakes, and allow one
+        # connection for each concurrent request
+        adapter = HTTPAdapter(pool_connections=1,
+                              pool_maxsize=self._args.api_max_workers)
+
+        self._session = requests.Session()
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._session.headers.update(self._headers)
+        self._session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+
+        self._timeout = (self._args.api_connect_timeout,
+                         self._args.api_read_timeout)
+
+        # URL -> (ETag, Last-Modified, data) of the conditional requests
+        self._conditional_responses = {}
+
+    def _get_data(self, path, params={}, conditional=False):
+        url = self._args.api_base_url + path
+        try:
+            headers = {}
+            last_response = None
+            if conditional:
+                last_response = self._conditional_responses.get(url, None)
+            if last_response is not None:
+                headers = self._build_conditional_headers(last_response)
+
+            r = self._session.get(url, params=params, headers=headers,
+                                  timeout=self._timeout)
+
+            if r.status_code == self._requests.codes.not_modified:
+                # Only the conditional requests can reuse the last data
+                if last_response is None:
+                    raise ValueError('Unexpected status {} without the'
+                                     ' conditional headers'.format(
+                                         r.status_code))
+                self._logger.debug('Not modified: {}'.format(url))
+                (_, _, data) = last_response
+                return data
 
-        params = {'format': 'JSON'}
-        station_list = self._get_data(
-            'https://ptx.transportdata.tw/MOTC/v2/Rail/THSR/Station',
-            params=params)
-        self._logger.debug('station_list={}'.format(station_list))
+            r.raise_for_status()
+            # Decode the bytes as UTF-8 without guessing the encoding, and
+            # json.loads only takes bytes since Python 3.6
+            data = json.loads(r.content.decode('utf-8'))
 
-        # Build the mapping from name to ID
-        self.name_to_id = {}
-        for station in station_list:
-            station_id = station['StationID']
-            station_name = station['StationName']
-            name_en = station_name['En']
-            name_tw = station_name['Zh_tw']
+            # Record the response so it can be replayed by the stand-in
+            if self._args.api_record_dir:
+                ApiRecording.save(self._args.api_record_dir, path, r.content)
 
-            self.name_to_id[name_en] = station_id
-            self.name_to_id[name_tw] = station_id
+            if conditional:
+                self._conditional_responses[url] = (
+                    r.headers.get('ETag', None),
+                    r.headers.get('Last-Modified', None),
+                    data)
 
-    def _get_data(self, url, params={}):
-        try:
-            r = requests.get(url, headers=self._headers, params=params)
-            r.raise_for_status()
-            text = r.text
-            return json.loads(text)
+            return data
         except:
             self._logger.exception('Failed to get station data')
             raise
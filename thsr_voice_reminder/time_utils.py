@@ -10,8 +10,9 @@ class TimeUtils:
         return time_num1 - time_num2
 
     @staticmethod
-    def check_active_weekday(active_weekday):
-        date = datetime.datetime.today()
+    def check_active_weekday(active_weekday, date=None):
+        if date is None:
+            date = datetime.datetime.today()
         full_weekday = date.strftime('%A')
         short_weekday = date.strftime('%a')
         return full_weekday in active_weekday or short_weekday in active_weekday
@@ -21,12 +22,21 @@ class TimeUtils:
         return datetime.datetime.today()
 
     @staticmethod
-    def get_cur_time_num():
-        date = datetime.datetime.today()
+    def get_cur_time_num(date=None):
+        if date is None:
+            date = datetime.datetime.today()
         hour = date.hour
         minute = date.minute
         return TimeUtils.hour_min_to_num(hour, minute)
 
+    @staticmethod
+    def get_next_day_timestamp(date=None):
+        if date is None:
+            date = datetime.datetime.today()
+        next_day = datetime.datetime.combine(
+            date.date() + datetime.timedelta(days=1), datetime.time())
+        return next_day.timestamp()
+
     @staticmethod
     def get_hour(time_obj, fixed=False):
         time_num = TimeUtils.time_to_num(time_obj)
@@ -49,6 +59,17 @@ class TimeUtils:
     def hour_min_to_num(hour, minute):
         return 60 * hour + minute
 
+    @staticmethod
+    def num_to_time(time_num):
+        return '{:02d}:{:02d}'.format(time_num // 60, time_num % 60)
+
+    @staticmethod
+    def num_to_timestamp(time_num, date=None):
+        if date is None:
+            date = datetime.datetime.today()
+        day_start = datetime.datetime.combine(date.date(), datetime.time())
+        return (day_start + datetime.timedelta(minutes=time_num)).timestamp()
+
     @staticmethod
     def time_to_num(time_obj):
         if type(time_obj) is str:
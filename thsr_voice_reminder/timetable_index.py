@@ -0,0 +1,48 @@
+import bisect
+
+
+class TimetableIndex:
+    OCCASION_TARGETS = [
+        ('orig', 'arrival'),
+        ('orig', 'departure'),
+        ('dest', 'arrival'),
+        ('dest', 'departure'),
+    ]
+
+    def __init__(self, trains):
+        self._trains = trains
+
+        self._build_index()
+
+    def get_trains(self):
+        return self._trains
+
+    def find_latest_train(self, occasion_target, time_num):
+        """
+        Finds the latest train whose occasion time is before the time.
+
+        Returns a tuple of the train and its occasion time, or None if there
+        is no such train.
+        """
+        sorted_index = self._index.get(occasion_target, None)
+        if sorted_index is None:
+            raise ValueError(
+                'Unknown occasion target "{}"'.format(occasion_target))
+
+        (times, trains) = sorted_index
+        i = bisect.bisect_left(times, time_num)
+        if i:
+            return (trains[i - 1], times[i - 1])
+        else:
+            return None
+
+    def _build_index(self):
+        self._index = {}
+        for occasion_target in self.OCCASION_TARGETS:
+            timed_trains = [(train.get_occasion_num(occasion_target), train)
+                            for train in self._trains]
+            timed_trains.sort(key=lambda timed_train: timed_train[0])
+
+            times = [time_num for (time_num, _) in timed_trains]
+            trains = [train for (_, train) in timed_trains]
+            self._index[occasion_target] = (times, trains)
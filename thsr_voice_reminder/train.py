@@ -2,69 +2,130 @@ from thsr_voice_reminder.time_utils import TimeUtils
 
 
 class Train:
-    def __init__(self, api_obj):
-        self._api_obj = api_obj
+    __slots__ = (
+        '_train_no',
+        '_direction',
+        '_orig_station_name',
+        '_dest_station_name',
+        '_orig_arrival_time',
+        '_orig_depart_time',
+        '_dest_arrival_time',
+        '_dest_depart_time',
+    )
+
+    OCCASION_SLOTS = {
+        ('orig', 'arrival'): '_orig_arrival_time',
+        ('orig', 'departure'): '_orig_depart_time',
+        ('dest', 'arrival'): '_dest_arrival_time',
+        ('dest', 'departure'): '_dest_depart_time',
+    }
+
+    # Shared station name objects, there are only a few stations
+    _station_names = {}
+
+    def __init__(self, train_no, direction, orig_station_name,
+                 dest_station_name, orig_arrival_time, orig_depart_time,
+                 dest_arrival_time, dest_depart_time):
+        self._train_no = train_no
+        self._direction = direction
+        self._orig_station_name = orig_station_name
+        self._dest_station_name = dest_station_name
+        self._orig_arrival_time = orig_arrival_time
+        self._orig_depart_time = orig_depart_time
+        self._dest_arrival_time = dest_arrival_time
+        self._dest_depart_time = dest_depart_time
+
+    @staticmethod
+    def from_api_obj(api_obj):
+        """
+        Builds the train from the PTX daily timetable object, only the used
+        fields are kept and the times are parsed to numbers.
+        """
+        daily_train_info = api_obj['DailyTrainInfo']
+        orig_stop_time = api_obj['OriginStopTime']
+        dest_stop_time = api_obj['DestinationStopTime']
+        return Train.from_stop_times(
+            daily_train_info,
+            orig_stop_time['StationName'],
+            TimeUtils.time_to_num(orig_stop_time['ArrivalTime']),
+            TimeUtils.time_to_num(orig_stop_time['DepartureTime']),
+            dest_stop_time['StationName'],
+            TimeUtils.time_to_num(dest_stop_time['ArrivalTime']),
+            TimeUtils.time_to_num(dest_stop_time['DepartureTime']))
+
+    @staticmethod
+    def from_stop_times(daily_train_info, orig_station_name,
+                        orig_arrival_time, orig_depart_time,
+                        dest_station_name, dest_arrival_time,
+                        dest_depart_time):
+        return Train(
+            daily_train_info['TrainNo'],
+            daily_train_info['Direction'],
+            Train._get_shared_station_name(orig_station_name),
+            Train._get_shared_station_name(dest_station_name),
+            orig_arrival_time,
+            orig_depart_time,
+            dest_arrival_time,
+            dest_depart_time)
 
     def get_occasion(self, occasion_target):
-        occasion = {
-            'orig': {
-                'arrival': self.get_orig_arrival_time(),
-                'departure': self.get_orig_depart_time(),
-            },
-            'dest': {
-                'arrival': self.get_dest_arrival_time(),
-                'departure': self.get_dest_depart_time(),
-            },
-        }
-
-        (where, when) = occasion_target
-        occasion_where = occasion.get(where, None)
-        if not occasion_where:
-            raise ValueError('Unknown target where "{}"'.format(where))
-        occasion_when = occasion_where.get(when, None)
-        if not occasion_when:
+        slot = self.OCCASION_SLOTS.get(occasion_target, None)
+        if slot is None:
+            (where, when) = occasion_target
+            if where not in ('orig', 'dest'):
+                raise ValueError('Unknown target where "{}"'.format(where))
             raise ValueError('Unknown target when "{}"'.format(when))
-        return occasion_when
+        return getattr(self, slot)
 
     def get_occasion_num(self, occasion_target):
-        occassion = self.get_occasion(occasion_target)
-        return TimeUtils.time_to_num(occassion)
+        return self.get_occasion(occasion_target)
 
     def get_daily_direction(self):
-        return self._api_obj['DailyTrainInfo']['Direction']
+        return self._direction
 
     def get_daily_train_no(self):
-        return self._api_obj['DailyTrainInfo']['TrainNo']
+        return self._train_no
 
     def get_orig_station_name(self):
-        return self._api_obj['OriginStopTime']['StationName']
+        return self._orig_station_name
 
     def get_orig_arrival_time(self):
-        return self._api_obj['OriginStopTime']['ArrivalTime']
+        return self._orig_arrival_time
 
     def get_orig_depart_time(self):
-        return self._api_obj['OriginStopTime']['DepartureTime']
+        return self._orig_depart_time
 
     def get_dest_station_name(self):
-        return self._api_obj['DestinationStopTime']['StationName']
+        return self._dest_station_name
 
     def get_dest_arrival_time(self):
-        return self._api_obj['DestinationStopTime']['ArrivalTime']
+        return self._dest_arrival_time
 
     def get_dest_depart_time(self):
-        return self._api_obj['DestinationStopTime']['DepartureTime']
+        return self._dest_depart_time
+
+    @staticmethod
+    def _get_shared_station_name(station_name):
+        key = (station_name['En'], station_name['Zh_tw'])
+        shared_station_name = Train._station_names.get(key, None)
+        if shared_station_name is None:
+            shared_station_name = {'En': key[0], 'Zh_tw': key[1]}
+            Train._station_names[key] = shared_station_name
+        return shared_station_name
 
     def __str__(self):
         texts = [
             'Train Number: {}'.format(self.get_daily_train_no()),
             'Origin Station Name: {}'.format(self.get_orig_station_name()),
-            'Origin Arrival Time: {}'.format(self.get_orig_arrival_time()),
-            'Origin Departure Time: {}'.format(self.get_orig_depart_time()),
+            'Origin Arrival Time: {}'.format(
+                TimeUtils.num_to_time(self.get_orig_arrival_time())),
+            'Origin Departure Time: {}'.format(
+                TimeUtils.num_to_time(self.get_orig_depart_time())),
             'Destination Station Name: {}'.format(
                 self.get_dest_station_name()),
             'Destination Arrival Time: {}'.format(
-                self.get_dest_arrival_time()),
+                TimeUtils.num_to_time(self.get_dest_arrival_time())),
             'Destination Departure Time: {}'.format(
-                self.get_dest_depart_time()),
+                TimeUtils.num_to_time(self.get_dest_depart_time())),
         ]
         return '\n'.join(texts)
@@ -0,0 +1,157 @@
+import importlib.util
+import shutil
+import subprocess
+import threading
+import time
+
+from thsr_voice_reminder.base import Base
+
+
+class TtsBackend(Base):
+    NAME = None
+    EXTENSION = None
+
+    def __init__(self, args):
+        super().__init__(self, args)
+
+        self._init_metrics()
+
+    @staticmethod
+    def create_backends(args, names):
+        """
+        Creates the available backends in the order of the names.
+        """
+        backend_classes = {
+            backend_class.NAME: backend_class
+            for backend_class in [GttsBackend, EspeakBackend, Pyttsx3Backend]
+        }
+
+        backends = []
+        for name in names:
+            backend_class = backend_classes.get(name, None)
+            if backend_class is None:
+                raise ValueError('Unknown TTS backend "{}"'.format(name))
+
+            backend = backend_class(args)
+            if backend.is_available():
+                backends.append(backend)
+            else:
+                backend._logger.warning(
+                    'TTS backend "{}" is not available'.format(name))
+
+        if not backends:
+            raise ValueError('No available TTS backend in {}'.format(names))
+        return backends
+
+    def is_available(self):
+        return True
+
+    def synthesize(self, message, lang, path):
+        """
+        Synthesizes the message and saves the audio to the path, and records
+        the latency.
+        """
+        start_time = time.time()
+        try:
+            self._synthesize(message, lang, path)
+        except:
+            self._num_failures += 1
+            raise
+        finally:
+            elapsed_time = time.time() - start_time
+            self._num_calls += 1
+            self._total_time += elapsed_time
+            self._last_time = elapsed_time
+
+        self._logger.info(self._format_metrics())
+
+    def get_metrics(self):
+        return {
+            'num_calls': self._num_calls,
+            'num_failures': self._num_failures,
+            'last_time': self._last_time,
+            'average_time': self._total_time / max(1, self._num_calls),
+        }
+
+    def _synthesize(self, message, lang, path):
+        raise NotImplementedError()
+
+    def _init_metrics(self):
+        self._num_calls = 0
+        self._num_failures = 0
+        self._total_time = 0.0
+        self._last_time = None
+
+    def _format_metrics(self):
+        metrics = self.get_metrics()
+        return ('Synthesized in {:.3f}s (average {:.3f}s, {} calls,'
+                ' {} failures)').format(
+            metrics['last_time'], metrics['average_time'],
+            metrics['num_calls'], metrics['num_failures'])
+
+
+class GttsBackend(TtsBackend):
+    NAME = 'gtts'
+    EXTENSION = '.mp3'
+
+    def _synthesize(self, message, lang, path):
+        # gTTS pulls in requests, import it on the first synthesis
+        from gtts import gTTS
+
+        tts = gTTS(message, lang=lang)
+        tts.save(path)
+
+
+class EspeakBackend(TtsBackend):
+    NAME = 'espeak'
+    EXTENSION = '.wav'
+
+    # 30 seconds
+    TIMEOUT = 30
+
+    # Language of gTTS -> voice of eSpeak
+    VOICES = {
+        'zh-tw': 'cmn',
+        'zh-cn': 'cmn',
+        'zh': 'cmn',
+    }
+
+    def __init__(self, args):
+        super().__init__(args)
+
+        self._executable = (shutil.which('espeak-ng')
+                            or shutil.which('espeak'))
+
+    def is_available(self):
+        return self._executable is not None
+
+    def _synthesize(self, message, lang, path):
+        voice = self.VOICES.get(lang, lang)
+        subprocess.run(
+            [self._executable, '-v', voice, '-w', path, message],
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            timeout=self.TIMEOUT)
+
+
+class Pyttsx3Backend(TtsBackend):
+    NAME = 'pyttsx3'
+    EXTENSION = '.wav'
+
+    def __init__(self, args):
+        super().__init__(args)
+
+        # The engine is not thread-safe
+        self._lock = threading.Lock()
+        self._engine = None
+
+    def is_available(self):
+        return importlib.util.find_spec('pyttsx3') is not None
+
+    def _synthesize(self, message, lang, path):
+        with self._lock:
+            if self._engine is None:
+                import pyttsx3
+                self._engine = pyttsx3.init()
+
+            self._engine.save_to_file(message, path)
+            self._engine.runAndWait()
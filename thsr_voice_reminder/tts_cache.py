@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import time
+
+from thsr_voice_reminder.base import Base
+
+
+class TtsCache(Base):
+    # 100 MB
+    MAX_CACHE_SIZE = 100 * 1024 * 1024
+    # 30 days
+    MAX_CACHE_AGE = 30 * 24 * 60 * 60
+
+    def __init__(self, args):
+        super().__init__(self, args)
+
+        self._init_cache_dir()
+
+    def is_enabled(self):
+        return self._cache_dir is not None
+
+    def get(self, message, lang, engine, extension):
+        """
+        Gets the path of the synthesized audio, or None if it's not cached.
+        """
+        if self._cache_dir is None:
+            return None
+
+        path = self._get_path(message, lang, engine, extension)
+        try:
+            # Update the modification time as the last used time
+            os.utime(path)
+        except OSError:
+            return None
+
+        self._logger.debug('Use cached voice {}'.format(path))
+        return path
+
+    def put(self, message, lang, engine, extension, src_path):
+        """
+        Moves the synthesized audio into the cache and returns its new path,
+        or None if the cache is disabled.
+        """
+        if self._cache_dir is None:
+            return None
+
+        path = self._get_path(message, lang, engine, extension)
+        try:
+            shutil.move(src_path, path)
+        except OSError:
+            self._logger.exception('Unable to cache voice {}'.format(path))
+            return None
+
+        self._evict(keep_path=path)
+        return path
+
+    def _init_cache_dir(self):
+        cache_dir = self._args.tts_cache_dir
+        if not cache_dir:
+            self._cache_dir = None
+            return
+
+        self._cache_dir = pathlib.Path(cache_dir)
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _get_path(self, message, lang, engine, extension):
+        # Address the audio by its content
+        content = json.dumps([engine, lang, message], ensure_ascii=False)
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        return str(self._cache_dir / '{}{}'.format(digest, extension))
+
+    def _evict(self, keep_path):
+        entries = []
+        for entry in os.scandir(str(self._cache_dir)):
+            if entry.is_file() and entry.path != keep_path:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        # Remove the least recently used files first
+        entries.sort()
+        total_size = sum(size for (_, size, _) in entries)
+        total_size += os.path.getsize(keep_path)
+        now = time.time()
+        for (mtime, size, path) in entries:
+            if (now - mtime <= self.MAX_CACHE_AGE
+                    and total_size <= self.MAX_CACHE_SIZE):
+                break
+
+            self._logger.debug('Evict cached voice {}'.format(path))
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total_size -= size
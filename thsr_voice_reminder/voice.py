@@ -1,8 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
 import tempfile
-
-from gtts import gTTS
+import threading
 
 from thsr_voice_reminder.base import Base
+from thsr_voice_reminder.tts_backend import TtsBackend
+from thsr_voice_reminder.tts_cache import TtsCache
 
 
 class Voice(Base):
@@ -10,6 +13,11 @@ class Voice(Base):
         super().__init__(self, args)
 
         self._sound = sound
+        self._tts_cache = TtsCache(self._args)
+        self._backends = TtsBackend.create_backends(
+            self._args, self._args.tts_backends.split(','))
+
+        self._init_prerender_state()
 
     def make_voice(self, actions):
         for action in actions:
@@ -17,22 +25,138 @@ class Voice(Base):
 
             sound_before = action['sound_before']
             message = action['voice']['message']
+            segments = action['voice'].get('segments', None)
             lang = action['voice']['lang']
 
             if len(message) > 0:
                 self._sound.play_sound(sound_before)
-                self.play_voice(message, lang)
+                if segments is not None:
+                    self.play_voice_segments(segments, lang)
+                else:
+                    self.play_voice(message, lang)
+
+    def prerender(self, actions):
+        """
+        Synthesizes the speech of the actions in the background, so they can
+        be played from the cache later.
+        """
+        if not self._tts_cache.is_enabled():
+            return
+
+        for action in actions:
+            message = action['voice']['message']
+            segments = action['voice'].get('segments', None)
+            lang = action['voice']['lang']
+            if message is None or len(message) == 0:
+                continue
+
+            if segments is None:
+                segments = [message]
+            for segment in segments:
+                self._prerender_segment(segment, lang)
+
+    def close(self):
+        """
+        Cancels the pending prerendering and stops its thread.
+        """
+        with self._prerender_lock:
+            for future in self._prerender_futures.values():
+                future.cancel()
+        self._prerender_executor.shutdown(wait=False)
 
     def play_voice(self, message, lang):
-        # Create a temporary file
-        f = tempfile.NamedTemporaryFile(delete=False)
+        (path, delete) = self._get_voice_path(message, lang)
+        self._play_voice_path(path, delete)
+
+    def play_voice_segments(self, segments, lang):
+        # Get all the segments first to avoid the gaps between them
+        paths = [self._get_voice_path(segment, lang) for segment in segments]
+        for (path, delete) in paths:
+            self._play_voice_path(path, delete)
+
+    def _get_voice_path(self, message, lang):
+        # Wait for the prerendering of the same speech
+        with self._prerender_lock:
+            future = self._prerender_futures.get((message, lang), None)
+        if future is not None:
+            future.result()
+
+        # Use the cached speech if it has been synthesized before
+        path = self._get_cached_voice_path(message, lang)
+        if path is not None:
+            return (path, False)
+
+        (temp_path, backend) = self._synthesize(message, lang)
+
+        # Keep the speech in the cache if possible
+        path = self._tts_cache.put(
+            message, lang, backend.NAME, backend.EXTENSION, temp_path)
+        if path is not None:
+            return (path, False)
+        else:
+            return (temp_path, True)
+
+    def _get_cached_voice_path(self, message, lang):
+        # Only the speech of the first available backend is reused, so a
+        # speech synthesized by a fallback backend during an outage doesn't
+        # stick until it expires, and the first backend is tried again
+        backend = self._backends[0]
+        return self._tts_cache.get(
+            message, lang, backend.NAME, backend.EXTENSION)
+
+    def _play_voice_path(self, path, delete):
+        if delete:
+            self._sound.play_sound_and_delete(path)
+        else:
+            self._sound.play_sound(path)
+
+    def _init_prerender_state(self):
+        self._prerender_executor = ThreadPoolExecutor(max_workers=1)
+        self._prerender_lock = threading.Lock()
+        # (message, lang) -> future of the prerendering
+        self._prerender_futures = {}
+
+    def _prerender_segment(self, message, lang):
+        key = (message, lang)
+        with self._prerender_lock:
+            if key in self._prerender_futures:
+                return
+            if self._get_cached_voice_path(message, lang) is not None:
+                return
+
+            self._logger.debug('Prerender voice: {}'.format(message))
+            self._prerender_futures[key] = self._prerender_executor.submit(
+                self._prerender_voice, message, lang)
+
+    def _prerender_voice(self, message, lang):
+        try:
+            (temp_path, backend) = self._synthesize(message, lang)
+            self._tts_cache.put(
+                message, lang, backend.NAME, backend.EXTENSION, temp_path)
+        except:
+            # Fall back to synthesizing when playing
+            self._logger.exception('Unable to prerender voice')
+        finally:
+            with self._prerender_lock:
+                del self._prerender_futures[(message, lang)]
 
-        # Convert speech to sound and save to the temporary file
-        tts = gTTS(message, lang=lang)
-        tts.save(f.name)
+    def _synthesize(self, message, lang):
+        # Try the backends in order until one of them succeeds
+        last_exception = None
+        for backend in self._backends:
+            # Create a temporary file
+            f = tempfile.NamedTemporaryFile(
+                suffix=backend.EXTENSION, delete=False)
+            f.close()
 
-        # Close the temporary file
-        f.close()
+            # Convert speech to sound and save to the temporary file
+            try:
+                backend.synthesize(message, lang, f.name)
+                return (f.name, backend)
+            except Exception as e:
+                self._logger.warning(
+                    'Unable to synthesize with {}: {}'.format(backend.NAME, e))
+                os.unlink(f.name)
+                last_exception = e
 
-        # Play the speech
-        self._sound.play_sound_and_delete(f.name)
+        raise last_exception